@@ -1,8 +1,15 @@
-import json, re, csv
+import json, re, csv, hashlib
 
 INPUT = "Hawker Centres (GEOJSON).geojson"
 OUT_JSON = "centres_min.json"
 OUT_CSV = "centres_seed.csv"
+OUT_COMPACT = "../backend/centres_compact.json"  # bundled with the Lambda
+
+FIELDS = ["id","name","lat","lon","postal_code","street","status","slug"]
+# The map only needs names; addresses stay available from GET /centres?fields=street,postal_code
+COMPACT_STRING_FIELDS = ["name","status"]
+COMPACT_FORMAT_VERSION = 1
+COORD_SCALE = 100000  # 5 decimal places ~ 1.1 m
 
 def slugify(s: str) -> str:
     s = s.lower().strip()
@@ -11,6 +18,52 @@ def slugify(s: str) -> str:
     s = re.sub(r"-{2,}", "-", s)
     return s
 
+def delta_encode(values):
+    """[a, b, c] -> [a, b-a, c-b]"""
+    out, prev = [], 0
+    for v in values:
+        out.append(v - prev)
+        prev = v
+    return out
+
+def encode_compact(centres):
+    """
+    Column-oriented centres payload for the map:
+    - id, lat and lon are delta-encoded integers (coordinates in fixed point, COORD_SCALE)
+    - string columns (COMPACT_STRING_FIELDS) hold indexes into a shared, de-duplicated string table
+    - slug is not stored: clients derive it with slugify(name); rows that differ go in slug_overrides
+    - version is a content hash, so clients can cache a given version forever
+    """
+    strings, string_ids = [], {}
+
+    def intern(value):
+        value = value or ""
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    columns = {
+        "id": delta_encode([c["id"] for c in centres]),
+        "lat": delta_encode([round(c["lat"] * COORD_SCALE) for c in centres]),
+        "lon": delta_encode([round(c["lon"] * COORD_SCALE) for c in centres]),
+    }
+    for field in COMPACT_STRING_FIELDS:
+        columns[field] = [intern(c.get(field)) for c in centres]
+
+    slug_overrides = {str(i): c["slug"] for i, c in enumerate(centres) if c["slug"] != slugify(c["name"])}
+
+    body = {
+        "count": len(centres),
+        "scale": COORD_SCALE,
+        "strings": strings,
+        "columns": columns,
+        "slug_overrides": slug_overrides,
+    }
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+    return {"format": "centres-compact", "v": COMPACT_FORMAT_VERSION, "version": digest.hexdigest()[:16], **body}
+
 with open(INPUT, "r", encoding="utf-8") as f:
     data = json.load(f)
 
@@ -66,8 +119,13 @@ with open(OUT_JSON, "w", encoding="utf-8") as f:
 
 # write CSV (easy DB seed)
 with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
-    w = csv.DictWriter(f, fieldnames=["id","name","lat","lon","postal_code","street","status","slug"])
+    w = csv.DictWriter(f, fieldnames=FIELDS)
     w.writeheader()
     w.writerows(centres)
 
-print(f"Exported {len(centres)} centres → {OUT_JSON} & {OUT_CSV}")
+# write compact columnar payload (bundled with the Lambda for GET /centres?format=compact)
+compact = encode_compact(centres)
+with open(OUT_COMPACT, "w", encoding="utf-8") as f:
+    json.dump(compact, f, ensure_ascii=False, separators=(",", ":"))
+
+print(f"Exported {len(centres)} centres → {OUT_JSON}, {OUT_CSV} & {OUT_COMPACT} (version {compact['version']})")
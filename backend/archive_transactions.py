@@ -0,0 +1,144 @@
+"""
+Move old points transactions out of hawker-game-points-transactions into the cold tier.
+
+Transactions older than the cutoff are grouped per user and month and written as
+gzipped JSON Lines objects (archive/transactions/user_id=<user>/month=YYYY-MM.jsonl.gz),
+merged with anything already archived for that month, recorded in the archived_months
+set on the user's points item, and only then deleted from the hot table. Re-running after
+a partial failure is safe: rows are de-duplicated by transaction_id. GET
+/points/transactions falls through to the recorded months once the hot table has no
+older rows.
+
+Usage:
+    python archive_transactions.py --older-than-days 90
+    python archive_transactions.py --older-than-days 90 --archive-dir ./archive --dry-run
+    python archive_transactions.py --backfill-markers   # record months archived before the marker existed
+
+Can also run as a scheduled Lambda (handler: archive_transactions.lambda_handler) with
+{"older_than_days": 90}.
+"""
+import argparse
+import gzip
+import json
+import urllib.parse
+from datetime import datetime, timedelta
+
+from boto3.dynamodb.conditions import Attr
+
+import lambda_function
+from lambda_function import (
+    TRANSACTION_ARCHIVE_PREFIX,
+    DecimalEncoder,
+    get_archived_months,
+    mark_archived_months,
+    scan_all,
+    transaction_archive_key,
+    transactions_table,
+)
+from storage import LocalStorage
+
+DEFAULT_RETENTION_DAYS = 90
+
+
+def group_by_user_month(items):
+    """{(user_id, 'YYYY-MM'): [items]}"""
+    groups = {}
+    for item in items:
+        groups.setdefault((item["user_id"], item["timestamp"][:7]), []).append(item)
+    return groups
+
+
+def write_archive_month(storage, user_id, month, items, exists):
+    """
+    Merge items into the month's archive object; returns the number of rows stored.
+    The existing object is only read when the user's marker says there is one.
+    """
+    key = transaction_archive_key(user_id, month)
+    rows = {}
+
+    existing = storage.get(key) if exists else None
+    if existing is not None:
+        for line in gzip.decompress(existing).decode("utf-8").splitlines():
+            if line:
+                row = json.loads(line)
+                rows[row["transaction_id"]] = row
+
+    for item in items:
+        rows[item["transaction_id"]] = json.loads(json.dumps(item, cls=DecimalEncoder))
+
+    ordered = sorted(rows.values(), key=lambda row: row.get("timestamp", ""), reverse=True)
+    body = "\n".join(json.dumps(row, separators=(",", ":")) for row in ordered) + "\n"
+    storage.put(key, gzip.compress(body.encode("utf-8")), content_type="application/gzip")
+    return len(ordered)
+
+
+def archive_transactions(older_than_days=DEFAULT_RETENTION_DAYS, storage=None, dry_run=False):
+    """Archive and delete hot transactions older than the cutoff; returns a summary"""
+    storage = storage or lambda_function.archive_storage
+    cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).isoformat() + "Z"
+
+    print(f"🔍 Scanning for transactions before {cutoff}...")
+    items = scan_all(transactions_table, FilterExpression=Attr("timestamp").lt(cutoff))
+    groups = group_by_user_month(items)
+    print(f"📦 {len(items)} transactions in {len(groups)} user-months")
+
+    if dry_run:
+        return {"cutoff": cutoff, "transactions": len(items), "objects": len(groups), "deleted": 0}
+
+    deleted = 0
+    known_months = {}
+    for (user_id, month), month_items in groups.items():
+        if user_id not in known_months:
+            known_months[user_id] = set(get_archived_months(user_id))
+
+        stored = write_archive_month(storage, user_id, month, month_items, month in known_months[user_id])
+        if month not in known_months[user_id]:
+            mark_archived_months(user_id, [month])
+            known_months[user_id].add(month)
+
+        # Only delete once the archive object holding these rows has been written
+        with transactions_table.batch_writer() as batch:
+            for item in month_items:
+                batch.delete_item(Key={"transaction_id": item["transaction_id"]})
+        deleted += len(month_items)
+
+        print(f"✅ {user_id} {month}: archived {len(month_items)} ({stored} in object)")
+
+    return {"cutoff": cutoff, "transactions": len(items), "objects": len(groups), "deleted": deleted}
+
+
+def backfill_markers(storage=None):
+    """Record archived_months for users whose objects were written before the marker existed"""
+    storage = storage or lambda_function.archive_storage
+    months_by_user = {}
+    for key in storage.list_keys(TRANSACTION_ARCHIVE_PREFIX):
+        user_part, _, month_part = key[len(TRANSACTION_ARCHIVE_PREFIX):].partition("/")
+        if not key.endswith(".jsonl.gz") or not user_part.startswith("user_id="):
+            continue
+        user_id = urllib.parse.unquote(user_part[len("user_id="):])
+        months_by_user.setdefault(user_id, set()).add(month_part[len("month="):-len(".jsonl.gz")])
+
+    for user_id, months in months_by_user.items():
+        mark_archived_months(user_id, months)
+    print(f"✅ Marked archived months for {len(months_by_user)} users")
+    return {"users": len(months_by_user)}
+
+
+def lambda_handler(event, context):
+    return archive_transactions(int(event.get("older_than_days", DEFAULT_RETENTION_DAYS)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old points transactions to the cold tier")
+    parser.add_argument("--older-than-days", type=int, default=DEFAULT_RETENTION_DAYS)
+    parser.add_argument("--archive-dir", help="Write to a local directory instead of the archive bucket")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be archived")
+    parser.add_argument("--backfill-markers", action="store_true",
+                        help="Record archived_months for objects already in the archive, then exit")
+    args = parser.parse_args()
+
+    target = LocalStorage(args.archive_dir) if args.archive_dir else None
+    if args.backfill_markers:
+        print(json.dumps(backfill_markers(target), indent=2))
+    else:
+        print(json.dumps(archive_transactions(args.older_than_days, target, args.dry_run), indent=2))
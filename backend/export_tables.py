@@ -0,0 +1,284 @@
+"""
+Export the game tables for offline analytics without starving live traffic.
+
+Each table is read with a parallel segmented scan (one thread per segment). All threads
+share a read-capacity budget: a fraction of the table's provisioned RCUs, or --max-rcu for
+on-demand tables. Each scan page is sized with Limit so it costs about one second of its
+segment's share of that budget, and a thread reserves the page's expected cost before scanning
+(waiting if the budget cannot cover it), then settles against the ConsumedCapacity actually
+reported. Pages are converted from raw DynamoDB attribute values in a single
+pass and streamed straight to disk:
+
+    <out>/<table>/part-<segment>.csv.gz                  (default)
+    <out>/<table>/part-<segment>-<page>.parquet          (--format parquet, needs pyarrow)
+
+Usage:
+    python export_tables.py --out ./export
+    python export_tables.py --tables challenges hawker-game-user-points --segments 16 --read-share 0.1
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lambda_function import (
+    centres_table,
+    challenges_table,
+    rewards_table,
+    transactions_table,
+    user_points_table,
+    user_rewards_table,
+)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+TABLES = {
+    table.name: table
+    for table in (
+        centres_table,
+        challenges_table,
+        user_points_table,
+        transactions_table,
+        rewards_table,
+        user_rewards_table,
+    )
+}
+
+DEFAULT_SEGMENTS = 8
+DEFAULT_READ_SHARE = 0.25
+DEFAULT_ON_DEMAND_RCU = 100
+RCU_BYTES = 8192           # eventually consistent scan reads: one RCU covers 8 KB
+DEFAULT_ITEM_BYTES = 1024  # used until DescribeTable reports item statistics
+
+
+class CapacityBudget:
+    """Token bucket in read capacity units, refilled continuously at `rate` RCU per second"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self, units):
+        """Block until `units` (at most one second of budget) are available, then reserve them"""
+        units = min(units, self.rate)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= units:
+                    self.tokens -= units
+                    return units
+                deficit = units - self.tokens
+            time.sleep(deficit / self.rate)
+
+    def charge(self, units):
+        """Settle a reservation: positive units take more, negative units refund an overestimate"""
+        with self.lock:
+            self.tokens = min(self.rate, self.tokens - units)
+
+
+def describe(table):
+    return table.meta.client.describe_table(TableName=table.name)["Table"]
+
+
+def read_budget(description, read_share, max_rcu):
+    """RCU per second available to the export"""
+    provisioned = description.get("ProvisionedThroughput", {}).get("ReadCapacityUnits", 0)
+    if provisioned:
+        return max(1.0, provisioned * read_share)
+    return float(max_rcu)
+
+
+def average_item_bytes(description):
+    """DescribeTable statistics are refreshed about every six hours, so fall back when they are empty"""
+    count = description.get("ItemCount", 0)
+    if not count:
+        return DEFAULT_ITEM_BYTES
+    return max(1, description.get("TableSizeBytes", 0) // count) or DEFAULT_ITEM_BYTES
+
+
+def page_limit(rate, segments, item_bytes):
+    """Items per scan page so that one page costs about one second of a segment's share of the budget"""
+    return max(1, int(rate / segments * RCU_BYTES / item_bytes))
+
+
+def number(text):
+    return int(text) if text.lstrip("-").isdigit() else float(text)
+
+
+def to_plain(value):
+    """
+    Raw DynamoDB attribute value ({"N": "1.5"}, {"M": {...}}, ...) -> plain Python in one pass,
+    skipping the Decimal round trip the resource layer would do
+    """
+    (kind, data), = value.items()
+    if kind == "S":
+        return data
+    if kind == "N":
+        return number(data)
+    if kind == "BOOL":
+        return data
+    if kind == "NULL":
+        return None
+    if kind == "M":
+        return {k: to_plain(v) for k, v in data.items()}
+    if kind == "L":
+        return [to_plain(v) for v in data]
+    if kind == "SS":
+        return sorted(data)
+    if kind == "NS":
+        return sorted(number(v) for v in data)
+    if kind == "B":
+        return bytes(data).hex()
+    if kind == "BS":
+        return sorted(bytes(v).hex() for v in data)
+    raise ValueError(f"Unknown attribute type: {kind}")
+
+
+def csv_cell(value):
+    """Nested values are written as JSON text"""
+    return json.dumps(value, separators=(",", ":")) if isinstance(value, (dict, list)) else value
+
+
+class CsvSegmentWriter:
+    """
+    Gzipped CSV for one segment. The header is fixed by the first page; attributes that
+    first appear later are kept in an _extra JSON column.
+    """
+
+    def __init__(self, path):
+        self.file = gzip.open(path, "wt", encoding="utf-8", newline="")
+        self.writer = None
+        self.columns = None
+
+    def write_page(self, rows):
+        if not rows:
+            return
+        if self.writer is None:
+            self.columns = sorted({key for row in rows for key in row})
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.columns + ["_extra"])
+        for row in rows:
+            extra = {k: v for k, v in row.items() if k not in self.columns}
+            self.writer.writerow(
+                [csv_cell(row.get(column)) for column in self.columns]
+                + [json.dumps(extra, separators=(",", ":")) if extra else ""]
+            )
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSegmentWriter:
+    """One Parquet file per scanned page, so each file's schema is inferred from its own rows"""
+
+    def __init__(self, path):
+        self.base = path[:-len(".parquet")]
+        self.pages = 0
+
+    def write_page(self, rows):
+        if not rows:
+            return
+        table = pyarrow.Table.from_pylist([{k: csv_cell(v) for k, v in row.items()} for row in rows])
+        pyarrow.parquet.write_table(table, f"{self.base}-{self.pages:05d}.parquet", compression="zstd")
+        self.pages += 1
+
+    def close(self):
+        pass
+
+
+def export_segment(table, segment, total_segments, budget, limit, expected, out_dir, file_format):
+    """
+    Scan one segment page by page. Each page reserves its expected cost from the shared budget
+    before the request and settles the difference afterwards; the next page expects what this
+    one actually cost. Uses the low-level client, which (unlike Table resources) is safe to share across threads.
+    """
+    extension = "csv.gz" if file_format == "csv" else "parquet"
+    path = os.path.join(out_dir, f"part-{segment:04d}.{extension}")
+    writer = CsvSegmentWriter(path) if file_format == "csv" else ParquetSegmentWriter(path)
+
+    kwargs = {
+        "TableName": table.name,
+        "Segment": segment,
+        "TotalSegments": total_segments,
+        "Limit": limit,
+        "ReturnConsumedCapacity": "TOTAL",
+    }
+    rows = 0
+    try:
+        while True:
+            reserved = budget.wait(expected)
+            response = table.meta.client.scan(**kwargs)
+            consumed = response.get("ConsumedCapacity", {}).get("CapacityUnits", 0)
+            budget.charge(consumed - reserved)
+            if consumed:
+                expected = consumed
+
+            page = [{k: to_plain(v) for k, v in item.items()} for item in response.get("Items", [])]
+            writer.write_page(page)
+            rows += len(page)
+
+            if "LastEvaluatedKey" not in response:
+                return rows
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    finally:
+        writer.close()
+
+
+def export_table(table, out_root, segments, read_share, max_rcu, file_format):
+    out_dir = os.path.join(out_root, table.name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    description = describe(table)
+    budget = CapacityBudget(read_budget(description, read_share, max_rcu))
+    item_bytes = average_item_bytes(description)
+    limit = page_limit(budget.rate, segments, item_bytes)
+    expected = max(0.5, limit * item_bytes / RCU_BYTES)
+    print(f"📤 {table.name}: {segments} segments at {budget.rate:.0f} RCU/s, {limit} items per page")
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        futures = [
+            pool.submit(export_segment, table, segment, segments, budget, limit, expected, out_dir, file_format)
+            for segment in range(segments)
+        ]
+        rows = sum(future.result() for future in futures)
+
+    elapsed = time.monotonic() - started
+    print(f"✅ {table.name}: {rows} rows in {elapsed:.1f}s")
+    return {"table": table.name, "rows": rows, "seconds": round(elapsed, 1), "path": out_dir}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel, rate-limited export of the game tables")
+    parser.add_argument("--tables", nargs="+", choices=sorted(TABLES), default=sorted(TABLES))
+    parser.add_argument("--out", default="export", help="Output directory")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS, help="Parallel scan segments per table")
+    parser.add_argument("--read-share", type=float, default=DEFAULT_READ_SHARE,
+                        help="Fraction of provisioned read capacity the export may use")
+    parser.add_argument("--max-rcu", type=float, default=DEFAULT_ON_DEMAND_RCU,
+                        help="RCU per second cap for on-demand tables")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and pyarrow is None:
+        parser.error("--format parquet requires pyarrow (pip install pyarrow)")
+
+    summary = [
+        export_table(TABLES[name], args.out, args.segments, args.read_share, args.max_rcu, args.format)
+        for name in args.tables
+    ]
+
+    with open(os.path.join(args.out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"exported_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "tables": summary}, f, indent=2)
@@ -0,0 +1,163 @@
+"""
+Image processing for seller challenge uploads.
+
+Deployed as a separate Lambda triggered by S3 ObjectCreated events on the challenges/
+prefix. For every upload it writes resized, metadata-free variants under
+variants/<challenge_id>/ plus a manifest.json, and records them on the challenge item
+as image_variants. If the challenge has not been created yet, create_seller_challenge
+picks the variants up from the manifest instead.
+
+Run locally against a directory instead of S3:
+    python image_processor.py photo.jpg --out ./processed
+"""
+import argparse
+import io
+import json
+import os
+import traceback
+import urllib.parse
+
+from PIL import Image, ImageOps
+
+try:
+    import pillow_avif  # noqa: F401  (optional: registers the AVIF encoder with Pillow)
+except ImportError:
+    pillow_avif = None
+
+from storage import LocalStorage, S3Storage
+
+S3_BUCKET = os.environ.get("S3_BUCKET", "hawker-game-assets-sarjune-2025")
+CHALLENGES_TABLE = os.environ.get("CHALLENGES_TABLE", "challenges")
+
+UPLOAD_PREFIX = "challenges/"
+VARIANT_PREFIX = "variants/"
+VARIANT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Longest edge in pixels for each variant
+VARIANT_SIZES = {"thumb": 320, "medium": 960}
+
+# format -> (Pillow format, file extension, content type, save options)
+VARIANT_FORMATS = {
+    "avif": ("AVIF", "avif", "image/avif", {"quality": 50}),
+    "webp": ("WEBP", "webp", "image/webp", {"quality": 80, "method": 6}),
+    "jpeg": ("JPEG", "jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def challenge_id_from_key(key):
+    """challenges/<user>-<timestamp>.jpg -> <user>-<timestamp> (matches create_presigned_upload_url)"""
+    return os.path.splitext(key[len(UPLOAD_PREFIX):])[0]
+
+
+def supported_formats():
+    """Output formats the installed Pillow can encode (AVIF needs pillow-avif-plugin or Pillow >= 11.3)"""
+    Image.init()
+    return [name for name, (pil_format, _, _, _) in VARIANT_FORMATS.items() if pil_format in Image.SAVE]
+
+
+def render_variants(data):
+    """
+    Decode an upload and re-encode it at each variant size and format.
+    Orientation is applied from EXIF first; the outputs carry no EXIF/XMP/ICC metadata.
+    Returns {size: {"width", "height", "images": {format: bytes}}}.
+    """
+    source = Image.open(io.BytesIO(data))
+    source = ImageOps.exif_transpose(source)
+    has_alpha = source.mode in ("RGBA", "LA") or (source.mode == "P" and "transparency" in source.info)
+    source = source.convert("RGBA" if has_alpha else "RGB")
+
+    formats = supported_formats()
+    variants = {}
+    for size, longest_edge in VARIANT_SIZES.items():
+        image = source.copy()
+        image.thumbnail((longest_edge, longest_edge), Image.LANCZOS)
+
+        images = {}
+        for name in formats:
+            pil_format, _, _, options = VARIANT_FORMATS[name]
+            frame = image.convert("RGB") if pil_format == "JPEG" else image
+            buffer = io.BytesIO()
+            frame.save(buffer, format=pil_format, **options)
+            images[name] = buffer.getvalue()
+
+        variants[size] = {"width": image.width, "height": image.height, "images": images}
+    return variants
+
+
+def process_upload(storage, key, table=None):
+    """
+    Generate and store variants for one uploaded object, write its manifest and
+    attach it to the challenge item (if the table is given and the item exists).
+    Returns the manifest.
+    """
+    data = storage.get(key)
+    if data is None:
+        raise FileNotFoundError(key)
+
+    challenge_id = challenge_id_from_key(key)
+    manifest = {"challenge_id": challenge_id, "source": storage.url(key), "variants": {}}
+
+    for size, variant in render_variants(data).items():
+        entry = {"width": variant["width"], "height": variant["height"]}
+        for name, image_bytes in variant["images"].items():
+            _, extension, content_type, _ = VARIANT_FORMATS[name]
+            variant_key = f"{VARIANT_PREFIX}{challenge_id}/{size}.{extension}"
+            storage.put(variant_key, image_bytes, content_type=content_type, cache_control=VARIANT_CACHE_CONTROL)
+            entry[name] = storage.url(variant_key)
+        manifest["variants"][size] = entry
+
+    storage.put(
+        f"{VARIANT_PREFIX}{challenge_id}/manifest.json",
+        json.dumps(manifest).encode("utf-8"),
+        content_type="application/json",
+    )
+
+    if table is not None:
+        try:
+            table.update_item(
+                Key={"id": challenge_id},
+                UpdateExpression="SET image_variants = :variants",
+                ConditionExpression="attribute_exists(id)",
+                ExpressionAttributeValues={":variants": manifest["variants"]},
+            )
+            print(f"✅ Attached image variants to challenge {challenge_id}")
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            print(f"ℹ️ Challenge {challenge_id} not created yet; variants left in manifest")
+
+    return manifest
+
+
+def lambda_handler(event, context):
+    import boto3
+
+    storage = S3Storage(S3_BUCKET)
+    table = boto3.resource("dynamodb").Table(CHALLENGES_TABLE)
+
+    processed = 0
+    for record in event.get("Records", []):
+        key = urllib.parse.unquote_plus(record["s3"]["object"]["key"])
+        if not key.startswith(UPLOAD_PREFIX):
+            continue
+        try:
+            process_upload(storage, key, table)
+            processed += 1
+        except Exception as e:
+            print(f"❌ Error processing {key}: {str(e)}")
+            traceback.print_exc()
+            raise
+
+    return {"processed": processed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate challenge image variants into a local directory")
+    parser.add_argument("image", help="Path to the uploaded photo")
+    parser.add_argument("--out", default="processed", help="Directory standing in for the S3 bucket")
+    args = parser.parse_args()
+
+    local = LocalStorage(args.out)
+    upload_key = f"{UPLOAD_PREFIX}{os.path.basename(args.image)}"
+    with open(args.image, "rb") as f:
+        local.put(upload_key, f.read())
+
+    print(json.dumps(process_upload(local, upload_key), indent=2))
@@ -1,13 +1,27 @@
+import base64
+import gzip
 import json
+import math
+import os
+import re
+import time
 import boto3
 import random
 import uuid
 from decimal import Decimal
 from boto3.dynamodb.conditions import Attr, Key
 import traceback
-from datetime import datetime
+import urllib.parse
+from datetime import datetime, timedelta
 import hashlib
 
+from storage import LocalStorage, S3Storage
+
+try:
+    import brotli  # optional: enables Content-Encoding: br
+except ImportError:
+    brotli = None
+
 dynamodb = boto3.resource("dynamodb")
 s3 = boto3.client("s3")
 
@@ -19,26 +33,269 @@ user_points_table = dynamodb.Table("hawker-game-user-points")
 transactions_table = dynamodb.Table("hawker-game-points-transactions")
 rewards_table = dynamodb.Table("hawker-game-rewards")
 user_rewards_table = dynamodb.Table("hawker-game-user-rewards")
+reward_stock_table = dynamodb.Table("hawker-game-reward-stock")
+analytics_table = dynamodb.Table("hawker-game-challenge-analytics")
+leaderboards_table = dynamodb.Table("hawker-game-leaderboards")
+rate_limits_table = dynamodb.Table("hawker-game-rate-limits")
+decks_table = dynamodb.Table("hawker-game-challenge-decks")
+wallet_summaries_table = dynamodb.Table("hawker-game-wallet-summaries")
 
 S3_BUCKET = "hawker-game-assets-sarjune-2025"
 
+# Cold tier for old points transactions (written by archive_transactions.py). ARCHIVE_DIR
+# points the archive at a local directory instead of S3, e.g. for tests.
+TRANSACTION_ARCHIVE_PREFIX = "archive/transactions/"
+archive_storage = (
+    LocalStorage(os.environ["ARCHIVE_DIR"]) if os.environ.get("ARCHIVE_DIR")
+    else S3Storage(os.environ.get("ARCHIVE_BUCKET", S3_BUCKET), s3)
+)
+
+# Limited reward inventory: remaining stock is split across write shards, each its own
+# partition ("<reward_id>#<n>") so a popular reward never concentrates on one key
+REWARD_STOCK_DEFAULT_SHARDS = 10
+REWARD_STOCK_MAX_SHARDS = 100  # get_remaining_stock reads every shard in one BatchGetItem (max 100 keys)
+SOLD_OUT_SHARD_TTL_SECONDS = 5
+
+_empty_stock_shards = {}
+
+# Claimed rewards expire after REWARD_VALIDITY_DAYS; expires_at (epoch seconds) is the table's
+# TTL attribute and, with active_user_id, the key of the sparse active-rewards index
+REWARD_VALIDITY_DAYS = 30
+ACTIVE_REWARDS_INDEX = 'user-active-rewards-index'
+MAX_PAGE_SIZE = 100
+
+# BatchGetItem returns UnprocessedKeys when throttled; they are retried with backoff this many
+# times before the read is reported as incomplete
+BATCH_GET_MAX_ATTEMPTS = 4
+
+# Challenge analytics rollups: per-seller counters in hourly and daily buckets, spread over
+# ANALYTICS_SHARDS partitions per seller. Buckets expire through the expires_at TTL.
+ANALYTICS_SHARDS = 4
+ANALYTICS_GRANULARITIES = {
+    # granularity: (bucket format, bucket length, default periods, max periods, retention)
+    "hour": ("%Y-%m-%dT%H", timedelta(hours=1), 24, 168, timedelta(days=14)),
+    "day": ("%Y-%m-%d", timedelta(days=1), 30, 90, timedelta(days=400)),
+}
+
+# Windowed leaderboards: earned points per (window_id, user_id), ranked through a key-only
+# index on (score_shard, score). Each window's players are spread over LEADERBOARD_SHARDS
+# index partitions ("<window_id>#<n>"), and a "#meta#<n>" item per shard counts its players
+# and keeps a histogram of their scores in log-spaced bands ("b<band>" attributes).
+LEADERBOARD_SCORE_INDEX = 'shard-score-index'
+LEADERBOARD_META_USER = '#meta'
+LEADERBOARD_SHARDS = 4
+# Per-shard cap on index entries counted inside the caller's band; beyond it the rank is estimated
+LEADERBOARD_BAND_COUNT_CAP = 500
+LEADERBOARD_WINDOWS = {
+    # window: retention after the window closes
+    "daily": timedelta(days=8),
+    "weekly": timedelta(weeks=5),
+    "season": timedelta(days=400),
+}
+
+# Wallet summaries: one item per user in their own table (so the points item, which the
+# all-time leaderboard scans, stays small) holding the newest WALLET_RECENT_ACTIVITY
+# transactions, earn tallies per source, this week's earnings and the expiry of each live
+# claimed reward. Earn sources outside WALLET_SOURCES are tallied as "other".
+WALLET_RECENT_ACTIVITY = 20
+WALLET_SOURCES = ('challenge', 'memory_game', 'sliding_puzzle', 'word_scramble', 'purchase')
+WALLET_OTHER_SOURCE = 'other'
+MAX_SOURCE_LENGTH = 50
+MAX_DESCRIPTION_LENGTH = 200
+WALLET_MAX_UPDATE_ATTEMPTS = 3
+
+# Per-client, per-route token buckets: route -> (capacity, refill per second, shared).
+# Every container enforces its own bucket; "shared" routes are also capped across containers
+# by a DynamoDB counter allowing `capacity` requests per capacity/refill-second window.
+# Override with RATE_LIMITS_JSON, e.g. {"POST /guess": [30, 1, true]}.
+RATE_LIMITS = {
+    "POST /guess": (20, 1.0, True),
+    "POST /points/earn": (10, 0.5, True),
+    "GET /leaderboard": (5, 0.2, True),
+    "GET /challenges/current": (30, 2.0, False),
+    "GET /centres/suggest": (30, 5.0, False),
+}
+RATE_LIMITS.update({
+    route: tuple(limit) for route, limit in json.loads(os.environ.get("RATE_LIMITS_JSON", "{}")).items()
+})
+RATE_LIMIT_MAX_TRACKED = 10000
+
+_rate_buckets = {}
+
+# Per-user challenge decks: a boost-weighted shuffle of unseen challenge ids, drawn from
+# the front and topped up in one scan once fewer than DECK_REFILL_AT remain
+DECK_SIZE = 50
+DECK_REFILL_AT = 5
+DECK_MAX_DRAW_ATTEMPTS = 3
+
+# Seller uploads
+MAX_BATCH_ITEMS = 25
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+UPLOAD_URL_EXPIRY_SECONDS = 300
+ALLOWED_UPLOAD_TYPES = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+
+# Centre catalogue cache (kept warm across invocations in the same container)
+CENTRES_CACHE_TTL_SECONDS = int(os.environ.get("CENTRES_CACHE_TTL_SECONDS", "900"))
+GUESS_MATCH_THRESHOLD = float(os.environ.get("GUESS_MATCH_THRESHOLD", "0.45"))
+GUESS_MATCH_MARGIN = float(os.environ.get("GUESS_MATCH_MARGIN", "0.1"))
+# Words most centre names share; a query made only of these names no centre in particular
+CENTRE_STOP_WORDS = frozenset({"food", "centre", "center", "market", "hawker", "cooked", "blk", "block", "and"})
+SUGGEST_MAX_RESULTS = 20
+
+# Responses at least this large are compressed when the client accepts it
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+
+# Attributes clients may request through ?fields= on list endpoints
+CENTRE_FIELDS = ("id", "name", "lat", "lon", "postal_code", "street", "status", "slug")
+CHALLENGE_FIELDS = (
+    "id", "answer_hawker_centre_id", "shop_description", "image_url", "image_variants", "status", "created_by",
+    "boost_count",
+)
+
+# Compact columnar centres payload generated by Prep/extractJSON.py and bundled with the function
+COMPACT_CENTRES_PATH = os.environ.get(
+    "COMPACT_CENTRES_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "centres_compact.json"),
+)
+COMPACT_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+COMPACT_DEFAULT_CACHE_CONTROL = "public, max-age=300"
+
+_compact_centres_cache = {"payload": None}
+
+# Marker clustering grid: one level per zoom, CLUSTER_CELL_PX-wide cells on 256px web-mercator tiles
+CLUSTER_MIN_ZOOM = 0
+CLUSTER_MAX_ZOOM = 18
+CLUSTER_CELL_PX = 64
+
+_cluster_cache = {"source": None, "grids": {}}
+
+_centres_cache = {"loaded_at": 0, "centres": [], "by_id": {}, "by_name": {}, "index": None}
+
+# Active reward catalogue, reused briefly so admin edits show up quickly
+REWARDS_CACHE_TTL_SECONDS = int(os.environ.get("REWARDS_CACHE_TTL_SECONDS", "60"))
+
+_rewards_cache = {"loaded_at": 0, "items": None}
+
+# Warm-up: events from these sources (or with "warmup": true) only fill the caches. With
+# PRELOAD_ON_INIT, or under provisioned concurrency, the caches are filled during init.
+WARMUP_SOURCES = ("aws.events", "serverless-plugin-warmup")
+PRELOAD_ON_INIT = os.environ.get("PRELOAD_ON_INIT", "").lower() in ("1", "true", "yes")
+
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Decimal):
             return int(obj) if obj % 1 == 0 else float(obj)
         return super(DecimalEncoder, self).default(obj)
 
-def respond(status, body):
+class BatchReadIncomplete(Exception):
+    """BatchGetItem still had unprocessed keys after BATCH_GET_MAX_ATTEMPTS tries"""
+
+def get_header(event, name):
+    """Case-insensitive request header lookup"""
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+def choose_encoding(event):
+    """Pick br or gzip from Accept-Encoding, honouring q=0 exclusions"""
+    accepted = set()
+    for part in (get_header(event, "accept-encoding") or "").split(","):
+        token, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        try:
+            weight = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            weight = 1.0
+        if weight > 0:
+            accepted.add(token.strip().lower())
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+def respond(status, body, event=None, headers=None):
+    """
+    Build an API Gateway response. When the request event is passed, bodies of at least
+    COMPRESSION_MIN_BYTES are compressed according to Accept-Encoding and returned base64-encoded.
+    """
+    response_headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, POST, PUT, PATCH, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    }
+    if headers:
+        response_headers.update(headers)
+
+    payload = json.dumps(body, cls=DecimalEncoder)
+
+    encoding = None
+    if event is not None:
+        response_headers["Vary"] = "Accept-Encoding"
+        if len(payload) >= COMPRESSION_MIN_BYTES:
+            encoding = choose_encoding(event)
+
+    if encoding is None:
+        return {"statusCode": status, "headers": response_headers, "body": payload}
+
+    data = payload.encode("utf-8")
+    compressed = brotli.compress(data) if encoding == "br" else gzip.compress(data, compresslevel=6)
+    response_headers["Content-Encoding"] = encoding
+
     return {
         "statusCode": status,
-        "headers": {
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, POST, PUT, PATCH, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type, Authorization",
-        },
-        "body": json.dumps(body, cls=DecimalEncoder),
+        "headers": response_headers,
+        "body": base64.b64encode(compressed).decode("ascii"),
+        "isBase64Encoded": True,
+    }
+
+def parse_fields(event, allowed, key_field="id"):
+    """
+    Parse ?fields=a,b,c into a list of attribute names (always including the key).
+    Returns None when no projection was requested; raises ValueError on unknown fields.
+    """
+    query_params = event.get('queryStringParameters', {}) or {}
+    raw = query_params.get('fields')
+    if not raw:
+        return None
+
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    if key_field not in fields:
+        fields.insert(0, key_field)
+    return fields
+
+def projection_kwargs(fields):
+    """ProjectionExpression kwargs for a field list (names are aliased to avoid reserved words)"""
+    if not fields:
+        return {}
+    names = {f"#p{i}": field for i, field in enumerate(fields)}
+    return {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
     }
 
+def encode_page_token(last_evaluated_key):
+    """Opaque pagination token from a DynamoDB LastEvaluatedKey (None when there are no more pages)"""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, cls=DecimalEncoder).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_page_token(token):
+    """ExclusiveStartKey kwargs for a token from encode_page_token; raises ValueError if malformed"""
+    if not token:
+        return {}
+    try:
+        return {"ExclusiveStartKey": json.loads(base64.urlsafe_b64decode(token.encode("ascii")))}
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid next_token") from e
+
 def get_user_info(event):
     """Extract user information from JWT token"""
     try:
@@ -106,6 +363,22 @@ def is_seller(groups):
     print(f"❌ No seller group found. Checked: {groups}")
     return False
 
+def get_seller(event, action):
+    """
+    Resolve the calling seller once per request.
+    Returns (username, None) or (None, error_response).
+    """
+    username, groups = get_user_info(event)
+
+    if not username:
+        return None, respond(401, {"message": "Could not identify user"})
+
+    if not is_seller(groups):
+        print(f"❌ Access denied for user {username}")
+        return None, respond(403, {"message": f"Access denied. Only sellers can {action}."})
+
+    return username, None
+
 def generate_random_discount():
     discounts = [5, 10, 15, 20]
     discount = random.choice(discounts)
@@ -143,11 +416,763 @@ def generate_anonymous_name(user_id):
     return f"{prefixes[prefix_idx]}{suffixes[suffix_idx]}{number}"
 
 
+def scan_all(table, **kwargs):
+    """Scan a table, following LastEvaluatedKey until every page is read"""
+    items = []
+    while True:
+        response = table.scan(**kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+def batch_get_all(request_items):
+    """
+    BatchGetItem that retries UnprocessedKeys with exponential backoff.
+    Returns {table_name: [items]}; raises BatchReadIncomplete rather than return a partial read.
+    """
+    found = {}
+    for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+        if attempt:
+            time.sleep(0.05 * 2 ** attempt)
+        response = dynamodb.batch_get_item(RequestItems=request_items)
+        for table_name, items in response.get("Responses", {}).items():
+            found.setdefault(table_name, []).extend(items)
+        request_items = response.get("UnprocessedKeys") or {}
+        if not request_items:
+            return found
+
+    raise BatchReadIncomplete(f"Unprocessed keys after {BATCH_GET_MAX_ATTEMPTS} attempts: {list(request_items)}")
+
+
+# Centre name matching
+def normalise_name(value):
+    """Lowercase, drop punctuation and collapse whitespace ("Adam Rd." -> "adam rd")"""
+    value = re.sub(r"[^a-z0-9]+", " ", str(value).lower())
+    return " ".join(value.split())
+
+def trigrams(value):
+    """Set of padded character trigrams for a normalised string"""
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def distinctive_words(value):
+    """Words of a normalised name that are not CENTRE_STOP_WORDS"""
+    return [word for word in value.split() if word not in CENTRE_STOP_WORDS]
+
+def centre_aliases(centre):
+    """
+    Names a centre may be guessed by: its full name and slug, the name before any
+    parenthetical, and each parenthetical alias (also split on "/"), e.g.
+    "Amoy Street Food Centre (Telok Ayer Food Centre)" -> "Amoy Street Food Centre", "Telok Ayer Food Centre"
+    """
+    name = centre.get("name", "")
+    aliases = {name, centre.get("slug", ""), name.split("(")[0]}
+    for inner in re.findall(r"\(([^)]*)\)", name):
+        aliases.add(inner)
+        aliases.update(inner.split("/"))
+    return aliases
+
+def build_centre_index(centres):
+    """
+    Build an inverted trigram index over centre names, slugs and aliases. Each trigram is
+    weighted by its inverse document frequency, so the "food centre" / "market" suffix most
+    names share counts for little and the distinctive part decides the match.
+    """
+    entries = []
+    postings = {}
+    for centre in centres:
+        for key in {normalise_name(alias) for alias in centre_aliases(centre)}:
+            if not distinctive_words(key):
+                continue
+            entry_idx = len(entries)
+            entries.append((centre, key, trigrams(key)))
+            for gram in entries[-1][2]:
+                postings.setdefault(gram, []).append(entry_idx)
+
+    total = len(entries)
+    weights = {gram: math.log((total + 1) / (len(ids) + 1)) for gram, ids in postings.items()}
+    entries = [
+        (centre, key, sum(weights[gram] for gram in grams))
+        for centre, key, grams in entries
+    ]
+    return {"entries": entries, "postings": postings, "weights": weights, "size": total}
+
+def get_centre_catalogue():
+    """Return the cached centre catalogue, reloading it once the TTL has passed"""
+    now = time.time()
+    if _centres_cache["index"] is None or now - _centres_cache["loaded_at"] > CENTRES_CACHE_TTL_SECONDS:
+        centres = scan_all(centres_table)
+        _centres_cache.update({
+            "loaded_at": now,
+            "centres": centres,
+            "by_id": {int(c["id"]): c for c in centres},
+            "by_name": {c["name"].lower(): c for c in centres},
+            "index": build_centre_index(centres),
+        })
+        print(f"✅ Loaded {len(centres)} centres into the warm cache")
+    return _centres_cache
+
+def match_centres(query, limit=1, prefer_prefix=True):
+    """
+    Rank centres against a free-text query by IDF-weighted trigram similarity: the mean of
+    how much of the query the name covers and their weighted Jaccard overlap.
+    Returns a list of (score, is_prefix, centre) tuples, best match first (prefix matches
+    first when prefer_prefix, as autocomplete wants).
+    """
+    index = get_centre_catalogue()["index"]
+    query = normalise_name(query)
+    if not distinctive_words(query):
+        return []
+
+    # Trigrams no centre has still count towards the query's weight
+    unseen_weight = math.log(index["size"] + 1)
+    query_grams = trigrams(query)
+    query_weight = sum(index["weights"].get(gram, unseen_weight) for gram in query_grams)
+
+    shared = {}
+    for gram in query_grams:
+        for entry_idx in index["postings"].get(gram, ()):
+            shared[entry_idx] = shared.get(entry_idx, 0) + index["weights"][gram]
+
+    best = {}
+    for entry_idx, common in shared.items():
+        centre, key, key_weight = index["entries"][entry_idx]
+        union = query_weight + key_weight - common
+        score = (common / query_weight + common / union) / 2 if union > 0 else 0.0
+        is_prefix = key.startswith(query) or f" {query}" in key
+        centre_id = int(centre["id"])
+        if centre_id not in best or score > best[centre_id][2]:
+            best[centre_id] = (centre, is_prefix or best.get(centre_id, (None, False))[1], score)
+
+    sort_key = (lambda m: (m[1], m[2])) if prefer_prefix else (lambda m: m[2])
+    ranked = sorted(best.values(), key=sort_key, reverse=True)
+    return [(round(score, 3), is_prefix, centre) for centre, is_prefix, score in ranked[:limit]]
+
+def mercator_xy(lat, lon):
+    """Project lat/lon onto the unit web-mercator square (0..1 on both axes)"""
+    sin_lat = math.sin(math.radians(float(lat)))
+    x = (float(lon) + 180.0) / 360.0
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+def build_cluster_grids(centres):
+    """
+    Precompute clusters for every zoom level by bucketing centres into fixed pixel cells.
+    Returns {zoom: [cluster, ...]} where a cluster is its centroid, count and, for
+    single-centre cells, the centre's id and name.
+    """
+    projected = [(c, mercator_xy(c["lat"], c["lon"])) for c in centres]
+    grids = {}
+    for zoom in range(CLUSTER_MIN_ZOOM, CLUSTER_MAX_ZOOM + 1):
+        cells_per_axis = (2 ** zoom) * 256 // CLUSTER_CELL_PX
+        cells = {}
+        for centre, (x, y) in projected:
+            cell = cells.setdefault((int(x * cells_per_axis), int(y * cells_per_axis)), [])
+            cell.append(centre)
+
+        clusters = []
+        for members in cells.values():
+            cluster = {
+                "lat": round(sum(float(c["lat"]) for c in members) / len(members), 6),
+                "lon": round(sum(float(c["lon"]) for c in members) / len(members), 6),
+                "count": len(members),
+            }
+            if len(members) == 1:
+                cluster["id"] = members[0]["id"]
+                cluster["name"] = members[0]["name"]
+            clusters.append(cluster)
+        grids[zoom] = clusters
+    return grids
+
+def get_cluster_grids():
+    """Return the cluster grids, rebuilding them whenever the centre catalogue reloads"""
+    centres = get_centre_catalogue()["centres"]
+    if _cluster_cache["source"] is not centres:
+        _cluster_cache["grids"] = build_cluster_grids(centres)
+        _cluster_cache["source"] = centres
+    return _cluster_cache["grids"]
+
+def resolve_centre(centre_name):
+    """
+    Resolve a guessed centre name to (centre, score). Returns (None, score) when the best
+    match is below GUESS_MATCH_THRESHOLD or not GUESS_MATCH_MARGIN ahead of the runner-up,
+    so ambiguous guesses are sent back with suggestions instead of being marked wrong.
+    """
+    catalogue = get_centre_catalogue()
+    exact = catalogue["by_name"].get(centre_name.strip().lower())
+    if exact is not None:
+        return exact, 1.0
+
+    matches = match_centres(centre_name, limit=2, prefer_prefix=False)
+    if not matches:
+        return None, 0.0
+
+    score, _, centre = matches[0]
+    runner_up = matches[1][0] if len(matches) > 1 else 0.0
+    if score < GUESS_MATCH_THRESHOLD or score - runner_up < GUESS_MATCH_MARGIN:
+        return None, score
+    return centre, score
+
+
+# Reward inventory helpers
+def stock_shard_key(reward_id, shard):
+    return {'shard_id': f"{reward_id}#{shard}"}
+
+def seed_reward_stock(reward_id, quantity, shards=REWARD_STOCK_DEFAULT_SHARDS):
+    """
+    Give a reward a limited quantity, split evenly across `shards` counter items.
+    Invoke directly: {"action": "seed_reward_stock", "reward_id": "...", "quantity": 500}
+    """
+    if not 1 <= shards <= REWARD_STOCK_MAX_SHARDS:
+        raise ValueError(f"shards must be between 1 and {REWARD_STOCK_MAX_SHARDS}")
+
+    base, extra = divmod(quantity, shards)
+    with reward_stock_table.batch_writer() as batch:
+        for shard in range(shards):
+            batch.put_item(Item={
+                **stock_shard_key(reward_id, shard),
+                'reward_id': reward_id,
+                'remaining': base + (1 if shard < extra else 0),
+            })
+
+    rewards_table.update_item(
+        Key={'reward_id': reward_id},
+        UpdateExpression='SET stock_total = :total, stock_shards = :shards',
+        ExpressionAttributeValues={':total': quantity, ':shards': shards}
+    )
+    _empty_stock_shards.pop(reward_id, None)
+
+    print(f"✅ Seeded {quantity} units of {reward_id} across {shards} shards")
+    return {"reward_id": reward_id, "quantity": quantity, "shards": shards}
+
+def take_reward_stock(reward_id, shards):
+    """
+    Atomically take one unit from a random shard that still has stock.
+    Shards found empty are skipped for SOLD_OUT_SHARD_TTL_SECONDS by this container.
+    Returns the shard used, or None when every shard is empty.
+    """
+    now = time.time()
+    empty = _empty_stock_shards.setdefault(reward_id, {})
+    candidates = [shard for shard in range(shards) if now - empty.get(shard, 0) > SOLD_OUT_SHARD_TTL_SECONDS]
+    random.shuffle(candidates)
+
+    for shard in candidates:
+        try:
+            reward_stock_table.update_item(
+                Key=stock_shard_key(reward_id, shard),
+                UpdateExpression='SET remaining = remaining - :one',
+                ConditionExpression='remaining >= :one',
+                ExpressionAttributeValues={':one': 1}
+            )
+            return shard
+        except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+            empty[shard] = now
+
+    return None
+
+def return_reward_stock(reward_id, shard):
+    """Put a unit back after a claim fails part-way"""
+    reward_stock_table.update_item(
+        Key=stock_shard_key(reward_id, shard),
+        UpdateExpression='ADD remaining :one',
+        ExpressionAttributeValues={':one': 1}
+    )
+    _empty_stock_shards.get(reward_id, {}).pop(shard, None)
+
+def get_remaining_stock(reward_id, shards):
+    """
+    Sum the remaining units across a reward's shards (one batch read, unprocessed keys retried).
+    Raises BatchReadIncomplete rather than under-report.
+    """
+    keys = [stock_shard_key(reward_id, shard) for shard in range(shards)]
+    found = batch_get_all({
+        reward_stock_table.name: {'Keys': keys, 'ProjectionExpression': 'remaining'}
+    })
+    items = found.get(reward_stock_table.name, [])
+    return sum(int(item.get('remaining', 0)) for item in items)
+
+
+def get_reward_catalogue():
+    """Return the cached active rewards, rescanning once the TTL has passed"""
+    now = time.time()
+    if _rewards_cache["items"] is None or now - _rewards_cache["loaded_at"] > REWARDS_CACHE_TTL_SECONDS:
+        _rewards_cache.update({
+            "loaded_at": now,
+            "items": scan_all(rewards_table, FilterExpression=Attr('active').eq(True)),
+        })
+        print(f"✅ Loaded {len(_rewards_cache['items'])} rewards into the warm cache")
+    return _rewards_cache["items"]
+
+
+# Challenge analytics helpers
+def record_challenge_activity(challenge, views=0, guesses=0, solves=0):
+    """
+    Add view/guess/solve counts to the challenge's hourly and daily buckets.
+    Analytics must never break gameplay, so failures are logged and swallowed.
+    """
+    seller = challenge.get('created_by')
+    if not seller:
+        return
+
+    try:
+        now = datetime.utcnow()
+        partition = f"seller#{seller}#{random.randrange(ANALYTICS_SHARDS)}"
+        centre = get_centre_catalogue()["by_id"].get(int(challenge.get('answer_hawker_centre_id', 0)))
+
+        for granularity, (bucket_format, _, _, _, retention) in ANALYTICS_GRANULARITIES.items():
+            analytics_table.update_item(
+                Key={
+                    'partition': partition,
+                    'bucket': f"{granularity}#{now.strftime(bucket_format)}#{challenge['id']}",
+                },
+                UpdateExpression=(
+                    'ADD #views :views, guesses :guesses, solves :solves '
+                    'SET challenge_id = :challenge, centre_name = :centre, expires_at = :expires'
+                ),
+                ExpressionAttributeNames={'#views': 'views'},
+                ExpressionAttributeValues={
+                    ':views': views,
+                    ':guesses': guesses,
+                    ':solves': solves,
+                    ':challenge': challenge['id'],
+                    ':centre': centre['name'] if centre else 'Unknown',
+                    ':expires': int(time.time() + retention.total_seconds()),
+                }
+            )
+    except Exception as e:
+        print(f"⚠️ Failed to record analytics for challenge {challenge.get('id')}: {str(e)}")
+
+def query_seller_buckets(seller, granularity, first_bucket, last_bucket):
+    """Read every counter item for a seller in a bucket range (one query per shard)"""
+    items = []
+    for shard in range(ANALYTICS_SHARDS):
+        kwargs = {
+            'KeyConditionExpression': Key('partition').eq(f"seller#{seller}#{shard}") & Key('bucket').between(
+                f"{granularity}#{first_bucket}", f"{granularity}#{last_bucket}~"
+            ),
+        }
+        while True:
+            response = analytics_table.query(**kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return items
+
+
+def load_image_variants(challenge_id):
+    """
+    Read the variant manifest written by image_processor.py for an upload.
+    Returns the variants map, or None if it cannot be read. That is the normal case when
+    the challenge is created before processing finishes: without s3:ListBucket a missing
+    manifest is an AccessDenied, not NoSuchKey. A lookup never fails challenge creation;
+    the processor attaches the variants once it is done.
+    """
+    try:
+        response = s3.get_object(Bucket=S3_BUCKET, Key=f"variants/{challenge_id}/manifest.json")
+        return json.loads(response["Body"].read())["variants"]
+    except Exception as e:
+        print(f"ℹ️ No image variants for {challenge_id} yet: {str(e)}")
+        return None
+
+
+# Rate limiting
+def rate_limit_client(event):
+    """Authenticated user id, falling back to the caller's IP for public routes"""
+    username, _ = get_user_info(event)
+    if username:
+        return f"user:{username}"
+    context = event.get("requestContext", {})
+    source_ip = context.get("http", {}).get("sourceIp") or context.get("identity", {}).get("sourceIp")
+    return f"ip:{source_ip or 'unknown'}"
+
+def take_local_token(key, capacity, refill):
+    """Token bucket kept in this container; returns seconds to wait, or 0 if allowed"""
+    now = time.time()
+    if key not in _rate_buckets and len(_rate_buckets) >= RATE_LIMIT_MAX_TRACKED:
+        _rate_buckets.clear()
+
+    tokens, updated = _rate_buckets.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) * refill)
+    if tokens < 1:
+        _rate_buckets[key] = (tokens, now)
+        return (1 - tokens) / refill
+
+    _rate_buckets[key] = (tokens - 1, now)
+    return 0
+
+def take_shared_token(key, capacity, refill):
+    """
+    Cross-container cap: at most `capacity` requests per window of capacity/refill seconds,
+    counted with a conditional ADD. Returns seconds until the window resets, or 0 if allowed.
+    Fails open if the counter table is unavailable.
+    """
+    window = capacity / refill
+    now = time.time()
+    window_start = int(now // window * window)
+    window_end = window_start + window
+
+    try:
+        rate_limits_table.update_item(
+            Key={'limit_key': f"{key}#{window_start}"},
+            UpdateExpression='ADD hits :one SET expires_at = :expires',
+            ConditionExpression='attribute_not_exists(hits) OR hits < :capacity',
+            ExpressionAttributeValues={':one': 1, ':capacity': int(capacity), ':expires': int(window_end) + 60}
+        )
+        return 0
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        return window_end - now
+    except Exception as e:
+        print(f"⚠️ Rate limit counter unavailable, allowing request: {str(e)}")
+        return 0
+
+def check_rate_limit(event, route_key):
+    """Return a 429 response if the caller is over the route's limit, else None"""
+    limit = RATE_LIMITS.get(route_key)
+    if not limit:
+        return None
+
+    capacity, refill, shared = limit
+    key = f"{rate_limit_client(event)}#{route_key}"
+
+    retry_after = take_local_token(key, capacity, refill)
+    if not retry_after and shared:
+        retry_after = take_shared_token(key, capacity, refill)
+
+    if not retry_after:
+        return None
+
+    print(f"🚦 Rate limited {key} for {retry_after:.1f}s")
+    return respond(
+        429,
+        {"message": "Too many requests. Please slow down.", "retry_after": math.ceil(retry_after)},
+        headers={"Retry-After": str(math.ceil(retry_after))}
+    )
+
+
+# Transaction archive helpers
+def transaction_archive_prefix(user_id):
+    return f"{TRANSACTION_ARCHIVE_PREFIX}user_id={urllib.parse.quote(user_id, safe='')}/"
+
+def transaction_archive_key(user_id, month):
+    """archive/transactions/user_id=<user>/month=2025-09.jsonl.gz"""
+    return f"{transaction_archive_prefix(user_id)}month={month}.jsonl.gz"
+
+def get_archived_months(user_id):
+    """
+    Archived months recorded on the user's points item by archive_transactions.py,
+    newest first. Users with no archive cost one small read and no S3 request.
+    """
+    item = user_points_table.get_item(
+        Key={'user_id': user_id},
+        ProjectionExpression='archived_months'
+    ).get('Item', {})
+    return sorted(item.get('archived_months', set()), reverse=True)
+
+def mark_archived_months(user_id, months):
+    """Record months that now have an archive object on the user's points item"""
+    user_points_table.update_item(
+        Key={'user_id': user_id},
+        UpdateExpression='ADD archived_months :months',
+        ExpressionAttributeValues={':months': set(months)}
+    )
+
+def read_archived_transactions(user_id, month):
+    """One month of archived transactions, newest first"""
+    data = archive_storage.get(transaction_archive_key(user_id, month))
+    if data is None:
+        return []
+    rows = [json.loads(line) for line in gzip.decompress(data).decode("utf-8").splitlines() if line]
+    rows.sort(key=lambda row: row.get('timestamp', ''), reverse=True)
+    return rows
+
+
+# Leaderboard helpers
+def leaderboard_window_id(window, when):
+    """daily#2026-10-19, weekly#2026-W42 (ISO week) or season#2026-Q4"""
+    if window == "daily":
+        return f"daily#{when.strftime('%Y-%m-%d')}"
+    if window == "weekly":
+        iso_year, iso_week, _ = when.isocalendar()
+        return f"weekly#{iso_year}-W{iso_week:02d}"
+    return f"season#{when.year}-Q{(when.month - 1) // 3 + 1}"
+
+def leaderboard_shard(window_id, user_id):
+    """Index partition a user's score lives on within a window"""
+    digest = hashlib.md5(user_id.encode("utf-8")).hexdigest()
+    return f"{window_id}#{int(digest, 16) % LEADERBOARD_SHARDS}"
+
+def leaderboard_meta_key(score_shard):
+    window_id, _, shard = score_shard.rpartition("#")
+    return {'window_id': window_id, 'user_id': f"{LEADERBOARD_META_USER}#{shard}"}
+
+def score_band(score):
+    """
+    Histogram band for a score: 1-3 exactly, then four bands per power of two, so each
+    band spans at most a quarter of its lower bound (4, 5, 6, 7, 8-9, 10-11, ...)
+    """
+    if score < 4:
+        return max(score, 0)
+    exponent = score.bit_length() - 1
+    return 4 * (exponent - 1) + ((score >> (exponent - 2)) & 3)
+
+def score_band_bounds(band):
+    """(lowest, highest) score in a band"""
+    if band < 4:
+        return band, band
+    exponent, step = band // 4 + 1, band % 4
+    return (4 + step) << (exponent - 2), ((5 + step) << (exponent - 2)) - 1
+
+def record_leaderboard_points(user_id, amount, when):
+    """
+    Add earned points to every current window and move the player between bands of their
+    shard's histogram. Windows roll over by id, and old windows are removed by the
+    expires_at TTL. Failures never fail the earn.
+    """
+    try:
+        for window, retention in LEADERBOARD_WINDOWS.items():
+            window_id = leaderboard_window_id(window, when)
+            score_shard = leaderboard_shard(window_id, user_id)
+            expires_at = int(time.time() + retention.total_seconds())
+
+            response = leaderboards_table.update_item(
+                Key={'window_id': window_id, 'user_id': user_id},
+                UpdateExpression='ADD score :amount SET expires_at = :expires, score_shard = :shard',
+                ExpressionAttributeValues={':amount': amount, ':expires': expires_at, ':shard': score_shard},
+                ReturnValues='UPDATED_OLD'
+            )
+
+            previous = response.get('Attributes', {})
+            old_score = int(previous.get('score', 0))
+            old_band, new_band = score_band(old_score), score_band(old_score + amount)
+            if 'score' in previous and old_band == new_band:
+                continue
+
+            # New player, or one who moved up a band: one write to the shard's meta item
+            update = 'SET expires_at = :expires ADD #new :one'
+            names = {'#new': f"b{new_band}"}
+            values = {':one': 1, ':expires': expires_at}
+            if 'score' in previous:
+                update += ', #old :minus_one'
+                names['#old'] = f"b{old_band}"
+                values[':minus_one'] = -1
+            else:
+                update += ', players :one'
+
+            leaderboards_table.update_item(
+                Key=leaderboard_meta_key(score_shard),
+                UpdateExpression=update,
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values
+            )
+    except Exception as e:
+        print(f"⚠️ Failed to update leaderboards for {user_id}: {str(e)}")
+
+
+# Challenge deck helpers
+def shuffle_by_boost(challenges, count):
+    """
+    Weighted shuffle without replacement (Efraimidis-Spirakis): each challenge is keyed by
+    random() ** (1 / weight) with weight 1 + boost_count, and the highest keys come first
+    """
+    keyed = [
+        (random.random() ** (1.0 / (1 + int(challenge.get('boost_count', 0)))), challenge['id'])
+        for challenge in challenges
+    ]
+    keyed.sort(reverse=True)
+    return [challenge_id for _, challenge_id in keyed[:count]]
+
+def refill_deck(queue, seen):
+    """
+    Top the queue up to DECK_SIZE with unseen active challenges. Once a player has seen
+    every active challenge the seen set is cleared and a new cycle starts.
+    Returns (queue, seen).
+    """
+    active = scan_all(
+        challenges_table,
+        FilterExpression=Attr('status').eq('active'),
+        **projection_kwargs(["id", "boost_count"])
+    )
+    queued = set(queue)
+    fresh = [c for c in active if c['id'] not in seen and c['id'] not in queued]
+    if not fresh and not queue:
+        seen = set()
+        fresh = active
+
+    return queue + shuffle_by_boost(fresh, DECK_SIZE - len(queue)), seen
+
+def draw_from_deck(username):
+    """
+    Pop the next challenge id off the user's deck, refilling it first when it runs low.
+    A version attribute guards against two tabs drawing at once; the draw is retried on a
+    conflict. Returns the id, or None if there is nothing to draw.
+    """
+    for _ in range(DECK_MAX_DRAW_ATTEMPTS):
+        deck = decks_table.get_item(Key={'user_id': username}).get('Item', {})
+        queue = list(deck.get('queue', []))
+        seen = set(deck.get('seen', set()))
+        version = int(deck.get('version', 0))
+
+        refilled = len(queue) < DECK_REFILL_AT
+        if refilled:
+            queue, seen = refill_deck(queue, seen)
+        if not queue:
+            return None
+
+        challenge_id = queue.pop(0)
+        condition = {
+            'ConditionExpression': 'attribute_not_exists(user_id) OR #version = :version',
+            'ExpressionAttributeNames': {'#version': 'version'},
+            'ExpressionAttributeValues': {':version': version},
+        }
+
+        try:
+            if refilled:
+                decks_table.put_item(
+                    Item={
+                        'user_id': username,
+                        'queue': queue,
+                        'seen': seen | {challenge_id},
+                        'version': version + 1,
+                        'built_at': datetime.utcnow().isoformat() + 'Z',
+                    },
+                    **condition
+                )
+            else:
+                # Pop in place: only the drawn id is sent, not the rest of the queue
+                condition['ExpressionAttributeNames'].update({'#queue': 'queue', '#seen': 'seen'})
+                condition['ExpressionAttributeValues'].update({
+                    ':drawn': {challenge_id},
+                    ':next': version + 1,
+                })
+                decks_table.update_item(
+                    Key={'user_id': username},
+                    UpdateExpression='REMOVE #queue[0] SET #version = :next ADD #seen :drawn',
+                    **condition
+                )
+            return challenge_id
+        except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+            print(f"ℹ️ Deck for {username} changed during draw, retrying")
+
+    return None
+
+def next_deck_challenge(username):
+    """Next active challenge from the user's deck, skipping ids deleted since the deck was built"""
+    for _ in range(DECK_MAX_DRAW_ATTEMPTS):
+        challenge_id = draw_from_deck(username)
+        if challenge_id is None:
+            return None
+
+        challenge = challenges_table.get_item(Key={'id': challenge_id}).get('Item')
+        if challenge and challenge.get('status') == 'active':
+            return challenge
+
+    return None
+
+
+# Wallet summary helpers
+def wallet_summary_updates(item, transaction, when, reward_expires_at=None):
+    """
+    Wallet summary attributes after one transaction, computed from the summary item
+    (never from the transaction history)
+    """
+    entry = format_transaction(transaction)
+    entry['description'] = (entry.get('description') or '')[:MAX_DESCRIPTION_LENGTH]
+    updates = {
+        'recent_activity': ([entry] + list(item.get('recent_activity', [])))[:WALLET_RECENT_ACTIVITY],
+    }
+
+    if transaction['type'] == 'earn':
+        amount = int(transaction['amount'])
+        source = transaction.get('source') if transaction.get('source') in WALLET_SOURCES else WALLET_OTHER_SOURCE
+        earned_by_source = dict(item.get('earned_by_source', {}))
+        tally = earned_by_source.get(source, {})
+        earned_by_source[source] = {
+            'count': int(tally.get('count', 0)) + 1,
+            'points': int(tally.get('points', 0)) + amount,
+        }
+
+        week_id = leaderboard_window_id('weekly', when)
+        earned_this_week = int(item.get('earned_this_week', 0)) if item.get('earned_week') == week_id else 0
+        updates.update({
+            'earned_by_source': earned_by_source,
+            'earned_week': week_id,
+            'earned_this_week': earned_this_week + amount,
+        })
+
+    if reward_expires_at is not None:
+        now = int(time.time())
+        live = [int(expiry) for expiry in item.get('reward_expiries', []) if int(expiry) > now]
+        updates['reward_expiries'] = live + [reward_expires_at]
+
+    return updates
+
+def update_wallet_summary(user_id, change):
+    """
+    Read-modify-write of one wallet summary. `change(item)` returns the attributes to set, or
+    None to leave the item alone. A version attribute guards against a concurrent earn, spend
+    or claim for the same user; the whole read-modify-write is retried on a conflict.
+    Returns True once written.
+    """
+    for _ in range(WALLET_MAX_UPDATE_ATTEMPTS):
+        item = wallet_summaries_table.get_item(Key={'user_id': user_id}).get('Item', {})
+        updates = change(item)
+        if updates is None:
+            return False
+
+        if 'version' in item:
+            condition = {
+                'ConditionExpression': '#version = :version',
+                'ExpressionAttributeNames': {'#version': 'version'},
+                'ExpressionAttributeValues': {':version': item['version']},
+            }
+        else:
+            condition = {
+                'ConditionExpression': 'attribute_not_exists(#version)',
+                'ExpressionAttributeNames': {'#version': 'version'},
+            }
+
+        version = int(item.get('version', 0))
+        item.update(updates)
+        item.update({'user_id': user_id, 'version': version + 1})
+
+        try:
+            wallet_summaries_table.put_item(Item=item, **condition)
+            return True
+        except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+            print(f"ℹ️ Wallet summary for {user_id} changed during update, retrying")
+
+    print(f"⚠️ Gave up updating wallet summary for {user_id} after {WALLET_MAX_UPDATE_ATTEMPTS} attempts")
+    return False
+
+def record_wallet_activity(user_id, transaction, when, reward_expires_at=None):
+    """Fold one transaction into the user's wallet summary. Failures never fail the points write."""
+    try:
+        update_wallet_summary(user_id, lambda item: dict(
+            wallet_summary_updates(item, transaction, when, reward_expires_at),
+            updated_at=transaction['timestamp'],
+        ))
+    except Exception as e:
+        print(f"⚠️ Failed to update wallet summary for {user_id}: {str(e)}")
+
+
 # NEW: Points Helper Functions
 def add_points(user_id, amount, source, description):
     """Award points to a user"""
     try:
-        timestamp = datetime.utcnow().isoformat() + 'Z'
+        now = datetime.utcnow()
+        timestamp = now.isoformat() + 'Z'
+        transaction = {
+            'transaction_id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'amount': amount,
+            'type': 'earn',
+            'source': source,
+            'description': description,
+            'timestamp': timestamp,
+            'metadata': {}
+        }
         
         # Get or create user points record
         response = user_points_table.get_item(Key={'user_id': user_id})
@@ -182,19 +1207,10 @@ def add_points(user_id, amount, source, description):
             )
         
         # Create transaction record
-        transaction_id = str(uuid.uuid4())
-        transactions_table.put_item(
-            Item={
-                'transaction_id': transaction_id,
-                'user_id': user_id,
-                'amount': amount,
-                'type': 'earn',
-                'source': source,
-                'description': description,
-                'timestamp': timestamp,
-                'metadata': {}
-            }
-        )
+        transactions_table.put_item(Item=transaction)
+        
+        record_wallet_activity(user_id, transaction, now)
+        record_leaderboard_points(user_id, amount, now)
         
         print(f"✅ Awarded {amount} points to {user_id}. New balance: {new_total}")
         return new_total
@@ -204,27 +1220,91 @@ def add_points(user_id, amount, source, description):
         traceback.print_exc()
         return None
 
+def is_warmup_event(event):
+    return bool(event.get("warmup")) or event.get("source") in WARMUP_SOURCES
+
+def warm_caches():
+    """
+    Fill the container's catalogue caches, opening the DynamoDB connection on the way.
+    A failing step is logged and skipped. Returns each step's duration in milliseconds.
+    """
+    steps = (
+        ("centres", get_centre_catalogue),
+        ("clusters", get_cluster_grids),
+        ("compact_centres", get_compact_centres),
+        ("rewards", get_reward_catalogue),
+    )
+
+    timings = {}
+    started = time.perf_counter()
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            step()
+            timings[name] = round((time.perf_counter() - step_started) * 1000, 1)
+        except Exception as e:
+            print(f"⚠️ Warm-up step {name} failed: {str(e)}")
+            timings[name] = None
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+
+    print(f"🔥 Warmed caches in {timings['total']}ms: {json.dumps(timings)}")
+    return timings
+
 def lambda_handler(event, context):
+    # Scheduled pings keep the container and its caches warm without touching any route
+    if is_warmup_event(event):
+        return {"warmup": True, "timings_ms": warm_caches()}
+
     print("EVENT:", json.dumps(event))
+
+    # Direct (non-HTTP) invocations for admin tasks
+    if event.get("action") == "seed_reward_stock":
+        return seed_reward_stock(
+            event["reward_id"],
+            int(event["quantity"]),
+            int(event.get("shards", REWARD_STOCK_DEFAULT_SHARDS)),
+        )
+
+    if event.get("action") == "backfill_reward_expiry":
+        return backfill_reward_expiry()
+
+    if event.get("action") == "backfill_wallet_summaries":
+        return backfill_wallet_summaries()
+
     route_key = event.get("routeKey", "")
 
+    # Reject over-limit callers before any expensive table access
+    rate_limited = check_rate_limit(event, route_key)
+    if rate_limited:
+        return rate_limited
+
     # Existing routes
     if route_key == "GET /centres":
-        return get_centres()
+        return get_centres(event)
+    elif route_key == "GET /centres/clusters":
+        return get_centre_clusters(event)
+    elif route_key == "GET /centres/suggest":
+        return suggest_centres(event)
     elif route_key == "GET /challenges/current":
-        return get_random_challenge()
+        return get_random_challenge(event)
     elif route_key == "GET /challenges/all":
-        return get_all_challenges()
+        return get_all_challenges(event)
     elif route_key == "POST /guess":
         return handle_guess(event)
     elif route_key == "POST /seller/upload-url":
         return create_presigned_upload_url(event)
     elif route_key == "POST /seller/challenge":
         return create_seller_challenge(event)
+    elif route_key == "POST /seller/upload-urls":
+        return create_presigned_upload_batch(event)
+    elif route_key == "POST /seller/challenges/batch":
+        return create_seller_challenge_batch(event)
     
     # NEW: Get seller's past challenges
     elif route_key == "GET /seller/challenges":
         return get_seller_challenges(event)
+    elif route_key == "GET /seller/analytics":
+        return get_seller_analytics(event)
     
     elif route_key == "GET /leaderboard":
         return handle_get_leaderboard(event)
@@ -236,6 +1316,8 @@ def lambda_handler(event, context):
         return handle_spend_points(event)
     elif route_key == "GET /points/balance":
         return handle_get_balance(event)
+    elif route_key == "GET /wallet/summary":
+        return handle_get_wallet_summary(event)
     elif route_key == "GET /points/transactions":
         return handle_get_transactions(event)
     elif route_key == "GET /rewards":
@@ -248,36 +1330,184 @@ def lambda_handler(event, context):
     else:
         return respond(404, {"message": f"Invalid route: {route_key}"})
 
-def get_centres():
+def get_compact_centres():
+    """Load the bundled compact centres artefact once per container"""
+    if _compact_centres_cache["payload"] is None:
+        with open(COMPACT_CENTRES_PATH, "r", encoding="utf-8") as f:
+            _compact_centres_cache["payload"] = json.load(f)
+        print(f"✅ Loaded compact centres version {_compact_centres_cache['payload']['version']}")
+    return _compact_centres_cache["payload"]
+
+def get_compact_centres_response(event):
+    """
+    Serve the compact centres payload
+    GET /centres?format=compact[&v=<version>]
+    Requests pinned to the current version may be cached forever; If-None-Match returns 304.
+    """
+    try:
+        payload = get_compact_centres()
+    except FileNotFoundError:
+        return respond(404, {"message": "Compact centres payload is not bundled with this deployment"})
+
+    query_params = event.get('queryStringParameters', {}) or {}
+    version = payload["version"]
+    etag = f'"{version}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            COMPACT_IMMUTABLE_CACHE_CONTROL if query_params.get("v") == version
+            else COMPACT_DEFAULT_CACHE_CONTROL
+        ),
+    }
+
+    if get_header(event, "if-none-match") == etag:
+        response = respond(304, {}, headers=headers)
+        response["body"] = ""
+        return response
+
+    return respond(200, payload, event=event, headers=headers)
+
+def get_centres(event):
+    """
+    Get all hawker centres from the warm catalogue
+    GET /centres?fields=id,name,lat,lon
+    GET /centres?format=compact (see get_compact_centres_response)
+    """
+    try:
+        query_params = event.get('queryStringParameters', {}) or {}
+        if query_params.get('format') == 'compact':
+            return get_compact_centres_response(event)
+
+        try:
+            fields = parse_fields(event, CENTRE_FIELDS)
+        except ValueError as e:
+            return respond(400, {"message": str(e)})
+
+        centres = get_centre_catalogue()["centres"]
+        if fields:
+            centres = [{f: c[f] for f in fields if f in c} for c in centres]
+
+        return respond(200, {"centres": centres}, event=event)
+    except Exception as e:
+        return respond(500, {"message": str(e)})
+
+def get_centre_clusters(event):
+    """
+    Get precomputed marker clusters for a map viewport
+    GET /centres/clusters?zoom=12&bbox=minLon,minLat,maxLon,maxLat
+    """
+    try:
+        query_params = event.get('queryStringParameters', {}) or {}
+
+        try:
+            zoom = int(query_params.get('zoom', 12))
+            bbox = [float(v) for v in query_params['bbox'].split(",")] if query_params.get('bbox') else None
+        except ValueError:
+            return respond(400, {"message": "zoom must be an integer and bbox four comma-separated numbers"})
+
+        if bbox is not None and len(bbox) != 4:
+            return respond(400, {"message": "bbox must be minLon,minLat,maxLon,maxLat"})
+
+        zoom = max(CLUSTER_MIN_ZOOM, min(CLUSTER_MAX_ZOOM, zoom))
+        clusters = get_cluster_grids()[zoom]
+
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            clusters = [
+                c for c in clusters
+                if min_lon <= c["lon"] <= max_lon and min_lat <= c["lat"] <= max_lat
+            ]
+
+        return respond(200, {
+            "zoom": zoom,
+            "clusters": clusters,
+            "count": len(clusters),
+            "total_centres": sum(c["count"] for c in clusters),
+        }, event=event)
+    except Exception as e:
+        print(f"❌ Error in get_centre_clusters: {str(e)}")
+        traceback.print_exc()
+        return respond(500, {"message": str(e)})
+
+def suggest_centres(event):
+    """
+    Autocomplete centre names from the warm trigram index
+    GET /centres/suggest?q=adam&limit=5
+    """
     try:
-        response = centres_table.scan()
-        return respond(200, {"centres": response.get("Items", [])})
+        query_params = event.get('queryStringParameters', {}) or {}
+        query = query_params.get('q', '')
+        try:
+            limit = int(query_params.get('limit', 5))
+        except ValueError:
+            return respond(400, {"message": "limit must be an integer"})
+        limit = max(1, min(limit, SUGGEST_MAX_RESULTS))
+
+        if not normalise_name(query):
+            return respond(400, {"message": "q is required"})
+
+        suggestions = [
+            {
+                "id": centre["id"],
+                "name": centre["name"],
+                "slug": centre.get("slug"),
+                "score": score,
+            }
+            for score, _, centre in match_centres(query, limit=limit)
+        ]
+
+        return respond(200, {"suggestions": suggestions, "count": len(suggestions)})
     except Exception as e:
+        print(f"❌ Error in suggest_centres: {str(e)}")
+        traceback.print_exc()
         return respond(500, {"message": str(e)})
 
-def get_random_challenge():
+def get_random_challenge(event):
+    """
+    GET /challenges/current
+    Signed-in players draw from their own deck; anonymous players get a uniform random pick.
+    """
     try:
+        username, _ = get_user_info(event)
+        if username:
+            try:
+                challenge = next_deck_challenge(username)
+            except Exception as e:
+                print(f"⚠️ Deck draw failed for {username}, falling back to random: {str(e)}")
+                challenge = None
+
+            if challenge:
+                record_challenge_activity(challenge, views=1)
+                return respond(200, challenge)
+
         response = challenges_table.scan(FilterExpression=Attr("status").eq("active"))
         items = response.get("Items", [])
         if not items:
             return respond(404, {"message": "No active challenges available."})
         
         challenge = random.choice(items)
+        record_challenge_activity(challenge, views=1)
         return respond(200, challenge)
     except Exception as e:
         print("Error in get_random_challenge:", str(e))
         return respond(500, {"message": str(e)})
 
-def get_all_challenges():
+def get_all_challenges(event):
     """
     Get all active challenges for public display (featured challenges)
-    GET /challenges/all
+    GET /challenges/all?fields=id,image_url
     This is a public endpoint - no authentication required
     """
     try:
+        try:
+            fields = parse_fields(event, CHALLENGE_FIELDS)
+        except ValueError as e:
+            return respond(400, {"message": str(e)})
+
         # Scan for all active challenges
         response = challenges_table.scan(
-            FilterExpression=Attr('status').eq('active')
+            FilterExpression=Attr('status').eq('active'),
+            **projection_kwargs(fields)
         )
         
         challenges = response.get('Items', [])
@@ -293,7 +1523,7 @@ def get_all_challenges():
         return respond(200, {
             "challenges": challenges,
             "count": len(challenges)
-        })
+        }, event=event)
         
     except Exception as e:
         print("❌ Error in get_all_challenges:", traceback.format_exc())
@@ -320,20 +1550,22 @@ def handle_guess(event):
         challenge = challenge_response["Item"]
         correct_centre_id = int(challenge.get("answer_hawker_centre_id", 0))
 
-        centres_response = centres_table.scan()
-        centres = {c["name"].lower(): c["id"] for c in centres_response.get("Items", [])}
-        
-        guessed_centre_id = centres.get(centre_name.lower())
+        guessed_centre, match_score = resolve_centre(centre_name)
 
-        if guessed_centre_id is None:
-            return respond(400, {"message": "Invalid centre name."})
+        if guessed_centre is None:
+            suggestions = [c["name"] for _, _, c in match_centres(centre_name, limit=3)]
+            return respond(400, {"message": "Invalid centre name.", "suggestions": suggestions})
 
-        is_correct = (guessed_centre_id == correct_centre_id)
+        is_correct = (int(guessed_centre["id"]) == correct_centre_id)
+        record_challenge_activity(challenge, guesses=1, solves=1 if is_correct else 0)
+        answer_centre = get_centre_catalogue()["by_id"].get(correct_centre_id)
         
         result = {
             "correct": is_correct,
             "message": "Congratulations! You got it right!" if is_correct else "Oops! That's not correct.",
-            "answer": next((c["name"] for c in centres_response["Items"] if c["id"] == correct_centre_id), "Unknown"),
+            "answer": answer_centre["name"] if answer_centre else "Unknown",
+            "matched_centre": guessed_centre["name"],
+            "match_score": match_score,
         }
 
         if is_correct:
@@ -372,12 +1604,14 @@ def handle_add_points(event):
         body = json.loads(event.get("body", "{}"))
         amount = body.get('amount')
         source = body.get('source')
-        description = body.get('description', '')
+        description = str(body.get('description', ''))[:MAX_DESCRIPTION_LENGTH]
         
         if not amount or amount <= 0:
             return respond(400, {"message": "Invalid amount"})
-        if not source:
+        if not source or not isinstance(source, str):
             return respond(400, {"message": "Source is required"})
+        if len(source) > MAX_SOURCE_LENGTH:
+            return respond(400, {"message": f"Source must be at most {MAX_SOURCE_LENGTH} characters"})
         
         new_balance = add_points(username, amount, source, description)
         
@@ -398,7 +1632,9 @@ def handle_spend_points(event):
     """
     Deduct points from a user
     POST /points/spend
-    Body: { amount: number, source: string, description: string }
+    Body: { amount: number, source: string, description: string, challenge_id?: string }
+    A "challenge_boost" spend with a challenge_id raises that challenge's boost_count,
+    which weights it in players' decks.
     """
     try:
         username, _ = get_user_info(event)
@@ -409,7 +1645,11 @@ def handle_spend_points(event):
         body = json.loads(event.get("body", "{}"))
         amount = body.get('amount')
         source = body.get('source', 'manual')
-        description = body.get('description', 'Points spent')
+        description = str(body.get('description', 'Points spent'))[:MAX_DESCRIPTION_LENGTH]
+        
+        if not isinstance(source, str) or len(source) > MAX_SOURCE_LENGTH:
+            return respond(400, {"message": f"Source must be a string of at most {MAX_SOURCE_LENGTH} characters"})
+        boost_challenge_id = body.get('challenge_id') if source == 'challenge_boost' else None
         
         # Validate amount
         if not amount or amount <= 0:
@@ -417,6 +1657,12 @@ def handle_spend_points(event):
         
         amount = int(amount)
         
+        # Sellers can only boost their own challenges
+        if boost_challenge_id:
+            challenge = challenges_table.get_item(Key={'id': boost_challenge_id}).get('Item')
+            if not challenge or challenge.get('created_by') != username:
+                return respond(404, {"message": "Challenge not found"})
+        
         # Check if user has enough points
         user_response = user_points_table.get_item(Key={'user_id': username})
         if 'Item' not in user_response:
@@ -437,7 +1683,18 @@ def handle_spend_points(event):
                 'shortfall': amount - current_balance
             })
         
-        timestamp = datetime.utcnow().isoformat() + 'Z'
+        now = datetime.utcnow()
+        timestamp = now.isoformat() + 'Z'
+        transaction = {
+            'transaction_id': str(uuid.uuid4()),
+            'user_id': username,
+            'amount': -amount,  # Negative for spend transaction
+            'type': 'spend',
+            'source': source,
+            'description': description,
+            'timestamp': timestamp,
+            'metadata': {'challenge_id': boost_challenge_id} if boost_challenge_id else {}
+        }
         
         # Deduct points
         new_balance = current_balance - amount
@@ -454,19 +1711,15 @@ def handle_spend_points(event):
         )
         
         # Create transaction record
-        transaction_id = str(uuid.uuid4())
-        transactions_table.put_item(
-            Item={
-                'transaction_id': transaction_id,
-                'user_id': username,
-                'amount': -amount,  # Negative for spend transaction
-                'type': 'spend',
-                'source': source,
-                'description': description,
-                'timestamp': timestamp,
-                'metadata': {}
-            }
-        )
+        transactions_table.put_item(Item=transaction)
+        record_wallet_activity(username, transaction, now)
+        
+        if boost_challenge_id:
+            challenges_table.update_item(
+                Key={'id': boost_challenge_id},
+                UpdateExpression='ADD boost_count :one',
+                ExpressionAttributeValues={':one': 1}
+            )
         
         print(f"✅ Deducted {amount} points from {username}. New balance: {new_balance}")
         
@@ -504,8 +1757,82 @@ def handle_get_balance(event):
         traceback.print_exc()
         return respond(500, {"message": str(e)})
 
+def handle_get_wallet_summary(event):
+    """
+    Everything the wallet screen shows: the user's points item and wallet summary,
+    read together in one BatchGetItem
+    GET /wallet/summary
+    """
+    try:
+        username, _ = get_user_info(event)
+        
+        if not username:
+            return respond(401, {"message": "User not authenticated"})
+        
+        key = {'user_id': username}
+        try:
+            found = batch_get_all({
+                user_points_table.name: {'Keys': [key]},
+                wallet_summaries_table.name: {'Keys': [key]},
+            })
+        except BatchReadIncomplete as e:
+            print(f"⚠️ Wallet summary read throttled for {username}: {str(e)}")
+            return respond(503, {"message": "Wallet is busy, please try again"})
+        points = (found.get(user_points_table.name) or [{}])[0]
+        item = (found.get(wallet_summaries_table.name) or [{}])[0]
+        
+        week_id = leaderboard_window_id('weekly', datetime.utcnow())
+        now = int(time.time())
+        
+        return respond(200, {
+            "total_points": int(points.get('total_points', 0)),
+            "lifetime_points": int(points.get('lifetime_points', 0)),
+            "points_spent": int(points.get('points_spent', 0)),
+            "earned_this_week": int(item.get('earned_this_week', 0)) if item.get('earned_week') == week_id else 0,
+            "earned_by_source": {
+                source: {'count': int(tally.get('count', 0)), 'points': int(tally.get('points', 0))}
+                for source, tally in item.get('earned_by_source', {}).items()
+            },
+            "recent_activity": [format_transaction(entry) for entry in item.get('recent_activity', [])],
+            "active_rewards": sum(1 for expiry in item.get('reward_expiries', []) if int(expiry) > now),
+            # False until the user's first write or the backfill; the wallet then reads the
+            # transactions and my-rewards endpoints instead
+            "has_summary": bool(item),
+        }, event=event)
+    except Exception as e:
+        print(f"❌ Error in handle_get_wallet_summary: {str(e)}")
+        traceback.print_exc()
+        return respond(500, {"message": str(e)})
+
+def format_transaction(item):
+    return {
+        'transaction_id': item.get('transaction_id'),
+        'amount': int(item.get('amount', 0)),
+        'type': item.get('type'),
+        'source': item.get('source'),
+        'description': item.get('description'),
+        'timestamp': item.get('timestamp')
+    }
+
+def valid_transactions_cursor(cursor):
+    """A decoded transactions token is a hot-table key, or an archive month with a row offset"""
+    if not isinstance(cursor, dict):
+        return False
+    if 'archive_month' not in cursor:
+        return True
+    offset = cursor.get('offset')
+    return (
+        isinstance(cursor['archive_month'], str)
+        and isinstance(offset, int) and not isinstance(offset, bool)
+        and offset >= 0
+    )
+
 def handle_get_transactions(event):
-    """Get user's transaction history"""
+    """
+    Get user's transaction history, newest first
+    GET /points/transactions?limit=20&next_token=...
+    Pages come from the hot table first, then fall through to the monthly archive.
+    """
     try:
         username, _ = get_user_info(event)
         
@@ -513,30 +1840,59 @@ def handle_get_transactions(event):
             return respond(401, {"message": "User not authenticated"})
         
         query_params = event.get('queryStringParameters', {}) or {}
-        limit = int(query_params.get('limit', 20))
-        
-        response = transactions_table.query(
-            IndexName='user-transactions-index',
-            KeyConditionExpression=Key('user_id').eq(username),
-            ScanIndexForward=False,
-            Limit=limit
-        )
+        try:
+            limit = int(query_params.get('limit', 20))
+        except ValueError:
+            return respond(400, {"message": "limit must be an integer"})
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        try:
+            cursor = decode_page_token(query_params.get('next_token')).get('ExclusiveStartKey', {})
+        except ValueError as e:
+            return respond(400, {"message": str(e)})
+        if not valid_transactions_cursor(cursor):
+            return respond(400, {"message": "Invalid next_token"})
         
         transactions = []
-        for item in response.get('Items', []):
-            transactions.append({
-                'transaction_id': item.get('transaction_id'),
-                'amount': int(item.get('amount', 0)),
-                'type': item.get('type'),
-                'source': item.get('source'),
-                'description': item.get('description'),
-                'timestamp': item.get('timestamp')
-            })
+        next_token = None
+
+        if 'archive_month' not in cursor:
+            start_key = {'ExclusiveStartKey': cursor} if cursor else {}
+            response = transactions_table.query(
+                IndexName='user-transactions-index',
+                KeyConditionExpression=Key('user_id').eq(username),
+                ScanIndexForward=False,
+                Limit=limit,
+                **start_key
+            )
+            transactions = [format_transaction(item) for item in response.get('Items', [])]
+
+            if 'LastEvaluatedKey' in response:
+                next_token = encode_page_token(response['LastEvaluatedKey'])
+            cursor = {'archive_month': None, 'offset': 0}
+
+        # Hot table exhausted: continue into the archive, one month object at a time
+        if next_token is None:
+            months = get_archived_months(username)
+            month_idx = months.index(cursor['archive_month']) if cursor['archive_month'] in months else 0
+            offset = cursor['offset'] if cursor['archive_month'] in months else 0
+
+            while month_idx < len(months) and len(transactions) < limit:
+                rows = read_archived_transactions(username, months[month_idx])
+                taken = rows[offset:offset + limit - len(transactions)]
+                transactions.extend(format_transaction(row) for row in taken)
+                offset += len(taken)
+                if offset >= len(rows):
+                    month_idx, offset = month_idx + 1, 0
+
+            if month_idx < len(months):
+                next_token = encode_page_token({'archive_month': months[month_idx], 'offset': offset})
         
         return respond(200, {
             'user_id': username,
             'transactions': transactions,
-            'count': len(transactions)
+            'count': len(transactions),
+            'next_token': next_token
         })
     except Exception as e:
         print(f"❌ Error in handle_get_transactions: {str(e)}")
@@ -546,12 +1902,8 @@ def handle_get_transactions(event):
 def handle_get_rewards(event):
     """Get all available rewards"""
     try:
-        response = rewards_table.scan(
-            FilterExpression=Attr('active').eq(True)
-        )
-        
         rewards = []
-        for item in response.get('Items', []):
+        for item in get_reward_catalogue():
             rewards.append({
                 'reward_id': item.get('reward_id'),
                 'id': item.get('reward_id'),
@@ -562,10 +1914,17 @@ def handle_get_rewards(event):
                 'centre_name': item.get('centre_name', 'Any participating centre'),
                 'active': item.get('active', True)
             })
+            if item.get('stock_shards'):
+                rewards[-1]['limited'] = True
+                rewards[-1]['stock_total'] = int(item.get('stock_total', 0))
+                rewards[-1]['remaining'] = get_remaining_stock(item['reward_id'], int(item['stock_shards']))
         
         rewards.sort(key=lambda x: x['points_cost'])
         
         return respond(200, {'rewards': rewards, 'count': len(rewards)})
+    except BatchReadIncomplete as e:
+        print(f"⚠️ Reward stock read throttled: {str(e)}")
+        return respond(503, {"message": "Rewards are busy, please try again"})
     except Exception as e:
         print(f"❌ Error in handle_get_rewards: {str(e)}")
         traceback.print_exc()
@@ -616,27 +1975,21 @@ def handle_claim_reward(event):
                 'shortfall': points_cost - current_balance
             })
         
-        timestamp = datetime.utcnow().isoformat() + 'Z'
-        
-        # Deduct points
-        new_balance = current_balance - points_cost
-        points_spent = int(user_points.get('points_spent', 0)) + points_cost
-        
-        user_points_table.update_item(
-            Key={'user_id': username},
-            UpdateExpression='SET total_points = :total, points_spent = :spent, updated_at = :updated',
-            ExpressionAttributeValues={
-                ':total': new_balance,
-                ':spent': points_spent,
-                ':updated': timestamp
-            }
-        )
-        
-        # Create transaction
-        transaction_id = str(uuid.uuid4())
-        transactions_table.put_item(
-            Item={
-                'transaction_id': transaction_id,
+        # Reserve a unit of limited stock before any points move
+        stock_shard = None
+        stock_shards = int(reward.get('stock_shards', 0))
+        if stock_shards:
+            stock_shard = take_reward_stock(reward_id, stock_shards)
+            if stock_shard is None:
+                return respond(409, {"message": "This reward is sold out"})
+        
+        try:
+            now = datetime.utcnow()
+            timestamp = now.isoformat() + 'Z'
+            expires = now + timedelta(days=REWARD_VALIDITY_DAYS)
+            expiry_date = expires.isoformat() + 'Z'
+            transaction = {
+                'transaction_id': str(uuid.uuid4()),
                 'user_id': username,
                 'amount': -points_cost,
                 'type': 'spend',
@@ -648,28 +2001,49 @@ def handle_claim_reward(event):
                     'reward_title': reward['title']
                 }
             }
-        )
         
-        # Create user reward
-        claim_id = str(uuid.uuid4())
-        from datetime import timedelta
-        expiry_date = (datetime.utcnow() + timedelta(days=30)).isoformat() + 'Z'
+            # Deduct points
+            new_balance = current_balance - points_cost
+            points_spent = int(user_points.get('points_spent', 0)) + points_cost
         
-        user_rewards_table.put_item(
-            Item={
-                'claim_id': claim_id,
-                'user_id': username,
-                'reward_id': reward_id,
-                'title': reward['title'],  # ✅ Add title
-                'description': reward['description'],  # ✅ Add description
-                'centre_name': reward.get('centre_name', 'Any participating centre'),  # ✅ Add centre_name
-                'discount_percentage': int(reward['discount_percentage']),
-                'points_cost': points_cost,  # ✅ Add points_cost
-                'claimed_at': timestamp,
-                'expiry_date': expiry_date,  # ✅ Add expiry_date
-                'status': 'active'
-            }
-        )
+            user_points_table.update_item(
+                Key={'user_id': username},
+                UpdateExpression='SET total_points = :total, points_spent = :spent, updated_at = :updated',
+                ExpressionAttributeValues={
+                    ':total': new_balance,
+                    ':spent': points_spent,
+                    ':updated': timestamp
+                }
+            )
+        
+            # Create transaction
+            transactions_table.put_item(Item=transaction)
+            record_wallet_activity(username, transaction, now, reward_expires_at(expiry_date))
+        
+            # Create user reward
+            claim_id = str(uuid.uuid4())
+        
+            user_rewards_table.put_item(
+                Item={
+                    'claim_id': claim_id,
+                    'user_id': username,
+                    'reward_id': reward_id,
+                    'title': reward['title'],  # ✅ Add title
+                    'description': reward['description'],  # ✅ Add description
+                    'centre_name': reward.get('centre_name', 'Any participating centre'),  # ✅ Add centre_name
+                    'discount_percentage': int(reward['discount_percentage']),
+                    'points_cost': points_cost,  # ✅ Add points_cost
+                    'claimed_at': timestamp,
+                    'expiry_date': expiry_date,  # ✅ Add expiry_date
+                    'expires_at': reward_expires_at(expiry_date),
+                    'active_user_id': username,  # sparse index key, only on live claims
+                    'status': 'active'
+                }
+            )
+        except Exception:
+            if stock_shard is not None:
+                return_reward_stock(reward_id, stock_shard)
+            raise
         
         return respond(200, {
             'message': 'Reward claimed successfully!',
@@ -688,18 +2062,41 @@ def handle_claim_reward(event):
         traceback.print_exc()
         return respond(500, {"message": str(e)})
 
+def reward_expires_at(expiry_date):
+    """ISO expiry_date ('...Z') -> epoch seconds for the TTL attribute"""
+    expires = datetime.fromisoformat(expiry_date.rstrip('Z'))
+    return int((expires - datetime(1970, 1, 1)).total_seconds())
+
 def handle_get_my_rewards(event):
-    """Get user's claimed rewards"""
+    """
+    Get user's live (active, unexpired) rewards, soonest expiry first
+    GET /rewards/my-rewards?limit=20&next_token=...
+    Reads the sparse user-active-rewards-index, so expired and used claims are never read.
+    """
     try:
         username, _ = get_user_info(event)
         
         if not username:
             return respond(401, {"message": "User not authenticated"})
         
+        query_params = event.get('queryStringParameters', {}) or {}
+        try:
+            limit = int(query_params.get('limit', 20))
+        except ValueError:
+            return respond(400, {"message": "limit must be an integer"})
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        try:
+            start_key = decode_page_token(query_params.get('next_token'))
+        except ValueError as e:
+            return respond(400, {"message": str(e)})
+        
+        # Items past expires_at linger until TTL deletes them, so bound the key range too
         response = user_rewards_table.query(
-            IndexName='user-rewards-index',
-            KeyConditionExpression=Key('user_id').eq(username),
-            ScanIndexForward=False
+            IndexName=ACTIVE_REWARDS_INDEX,
+            KeyConditionExpression=Key('active_user_id').eq(username) & Key('expires_at').gt(int(time.time())),
+            Limit=limit,
+            **start_key
         )
         
         rewards = []
@@ -707,23 +2104,121 @@ def handle_get_my_rewards(event):
             rewards.append({
                 'claim_id': item.get('claim_id'),
                 'reward_id': item.get('reward_id'),
-                'reward_title': item.get('reward_title'),
+                'title': item.get('title'),
+                'description': item.get('description'),
+                'centre_name': item.get('centre_name'),
                 'discount_percentage': int(item.get('discount_percentage', 0)),
-                'points_spent': int(item.get('points_spent', 0)),
+                'points_cost': int(item.get('points_cost', 0)),
                 'claimed_at': item.get('claimed_at'),
+                'expiry_date': item.get('expiry_date'),
                 'status': item.get('status', 'active')
             })
         
         return respond(200, {
             'user_id': username,
             'rewards': rewards,
-            'count': len(rewards)
+            'count': len(rewards),
+            'next_token': encode_page_token(response.get('LastEvaluatedKey'))
         })
     except Exception as e:
         print(f"❌ Error in handle_get_my_rewards: {str(e)}")
         traceback.print_exc()
         return respond(500, {"message": str(e)})
 
+def backfill_reward_expiry():
+    """
+    One-off: add expires_at/active_user_id to claims made before TTL was enabled.
+    Invoke directly: {"action": "backfill_reward_expiry"}
+    """
+    updated = 0
+    now = int(time.time())
+    for item in scan_all(user_rewards_table, FilterExpression=Attr('expires_at').not_exists()):
+        expiry_date = item.get('expiry_date')
+        if not expiry_date:
+            continue
+
+        expires_at = reward_expires_at(expiry_date)
+        update = 'SET expires_at = :expires'
+        values = {':expires': expires_at}
+        if item.get('status', 'active') == 'active' and expires_at > now:
+            update += ', active_user_id = :user'
+            values[':user'] = item['user_id']
+
+        user_rewards_table.update_item(
+            Key={'claim_id': item['claim_id']},
+            UpdateExpression=update,
+            ExpressionAttributeValues=values
+        )
+        updated += 1
+
+    print(f"✅ Backfilled expiry on {updated} claimed rewards")
+    return {"updated": updated}
+
+def build_wallet_summary(user_id):
+    """
+    Wallet summary attributes rebuilt from the user's transactions (hot table only, oldest
+    first) and their live claimed rewards
+    """
+    transactions = []
+    kwargs = {
+        'IndexName': 'user-transactions-index',
+        'KeyConditionExpression': Key('user_id').eq(user_id),
+        'ScanIndexForward': True,
+    }
+    while True:
+        response = transactions_table.query(**kwargs)
+        transactions.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    summary = {'recent_activity': [], 'earned_by_source': {}}
+    for transaction in transactions:
+        when = datetime.fromisoformat(transaction['timestamp'].rstrip('Z'))
+        summary.update(wallet_summary_updates(summary, transaction, when))
+
+    expiries = []
+    kwargs = {
+        'IndexName': ACTIVE_REWARDS_INDEX,
+        'KeyConditionExpression': Key('active_user_id').eq(user_id) & Key('expires_at').gt(int(time.time())),
+        **projection_kwargs(['expires_at']),
+    }
+    while True:
+        response = user_rewards_table.query(**kwargs)
+        expiries.extend(int(item['expires_at']) for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    summary['reward_expiries'] = expiries
+
+    if transactions:
+        summary['updated_at'] = transactions[-1]['timestamp']
+    return summary
+
+def backfill_wallet_summaries():
+    """
+    One-off: build wallet summaries for users who had points before summaries existed.
+    Invoke directly: {"action": "backfill_wallet_summaries"}
+    Summaries are rebuilt from source, so users who already played since the deploy get their
+    older history too; each is marked backfilled_at and skipped on a re-run. Transactions
+    already moved to the S3 archive are not counted.
+    """
+    built = 0
+    started = datetime.utcnow().isoformat() + 'Z'
+    for user in scan_all(user_points_table, **projection_kwargs(['user_id'])):
+        user_id = user['user_id']
+
+        def rebuild(item):
+            if item.get('backfilled_at'):
+                return None
+            return dict(build_wallet_summary(user_id), backfilled_at=started)
+
+        if update_wallet_summary(user_id, rebuild):
+            built += 1
+
+    print(f"✅ Backfilled {built} wallet summaries")
+    return {"built": built}
+
 # Seller functions
 def create_presigned_upload_url(event):
     try:
@@ -772,10 +2267,175 @@ def create_presigned_upload_url(event):
         print("❌ Error in create_presigned_upload_url:", traceback.format_exc())
         return respond(500, {"message": f"Failed to create presigned URL: {str(e)}"})
     
+def create_presigned_upload_batch(event):
+    """
+    Mint several presigned POST policies in one request
+    POST /seller/upload-urls
+    Body: { files: [{ file_name, content_type? }, ...] }
+    Each policy pins the object key and content type and caps the size at MAX_UPLOAD_BYTES.
+    """
+    try:
+        username, error_response = get_seller(event, "upload challenges")
+        if error_response:
+            return error_response
+
+        body = json.loads(event.get("body", "{}"))
+        files = body.get("files") or []
+
+        if not isinstance(files, list) or not files:
+            return respond(400, {"message": "files must be a non-empty list"})
+        if len(files) > MAX_BATCH_ITEMS:
+            return respond(400, {"message": f"At most {MAX_BATCH_ITEMS} files per request"})
+
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        uploads = []
+        for idx, file_info in enumerate(files):
+            if not isinstance(file_info, dict):
+                return respond(400, {"message": f"File {idx} must be an object with file_name and content_type"})
+            content_type = file_info.get("content_type", "image/jpeg")
+            if content_type not in ALLOWED_UPLOAD_TYPES:
+                return respond(400, {
+                    "message": f"Unsupported content_type for file {idx}: {content_type}",
+                    "allowed": sorted(ALLOWED_UPLOAD_TYPES),
+                })
+
+            challenge_id = f"{username}-{timestamp}-{idx}"
+            key = f"challenges/{challenge_id}.{ALLOWED_UPLOAD_TYPES[content_type]}"
+
+            post = s3.generate_presigned_post(
+                Bucket=S3_BUCKET,
+                Key=key,
+                Fields={"Content-Type": content_type},
+                Conditions=[
+                    {"Content-Type": content_type},
+                    ["content-length-range", 1, MAX_UPLOAD_BYTES],
+                ],
+                ExpiresIn=UPLOAD_URL_EXPIRY_SECONDS,
+            )
+
+            uploads.append({
+                "file_name": file_info.get("file_name"),
+                "upload_url": post["url"],
+                "fields": post["fields"],
+                "public_url": f"https://{S3_BUCKET}.s3.amazonaws.com/{key}",
+                "challenge_id": challenge_id,
+            })
+
+        return respond(200, {
+            "uploads": uploads,
+            "count": len(uploads),
+            "max_bytes": MAX_UPLOAD_BYTES,
+            "expires_in": UPLOAD_URL_EXPIRY_SECONDS,
+        })
+    except Exception as e:
+        print("❌ Error in create_presigned_upload_batch:", traceback.format_exc())
+        return respond(500, {"message": f"Failed to create presigned uploads: {str(e)}"})
+
+def get_windowed_leaderboard(username, window):
+    """
+    Top 10 and the user's rank for one leaderboard window, with a request count and read
+    cost that do not grow with the number of players:
+    - one Limit=10 index query per shard for the top 10;
+    - one BatchGetItem for the user's score and every shard's meta item (unprocessed keys
+      are retried; BatchReadIncomplete is raised rather than rank from partial counts);
+    - per shard, a COUNT query inside the user's band, capped at LEADERBOARD_BAND_COUNT_CAP.
+
+    Rank = 1 + players in higher bands (from the histograms) + players above the user in
+    their own band. If a band holds more than the cap, the rank is interpolated and
+    reported as approximate.
+    """
+    window_id = leaderboard_window_id(window, datetime.utcnow())
+    shards = [f"{window_id}#{n}" for n in range(LEADERBOARD_SHARDS)]
+
+    leaders = []
+    for score_shard in shards:
+        leaders.extend(leaderboards_table.query(
+            IndexName=LEADERBOARD_SCORE_INDEX,
+            KeyConditionExpression=Key('score_shard').eq(score_shard),
+            ScanIndexForward=False,
+            Limit=10
+        ).get('Items', []))
+    leaders.sort(key=lambda entry: int(entry.get('score', 0)), reverse=True)
+
+    keys = [{'window_id': window_id, 'user_id': username}]
+    keys.extend(leaderboard_meta_key(score_shard) for score_shard in shards)
+    # Unprocessed keys are retried: a missing meta row would understate every count below
+    batch = batch_get_all({leaderboards_table.name: {'Keys': keys}})
+    found = {item['user_id']: item for item in batch.get(leaderboards_table.name, [])}
+    metas = [item for user_id, item in found.items() if user_id.startswith(LEADERBOARD_META_USER)]
+
+    current_user_points = int(found.get(username, {}).get('score', 0))
+    total_players = sum(int(meta.get('players', 0)) for meta in metas)
+
+    current_user_rank = None
+    rank_is_approximate = False
+    if username in found:
+        band = score_band(current_user_points)
+        band_low, band_high = score_band_bounds(band)
+
+        higher = 0
+        band_size = 0
+        for meta in metas:
+            for name, count in meta.items():
+                if name.startswith('b') and name[1:].isdigit():
+                    if int(name[1:]) > band:
+                        higher += int(count)
+                    elif int(name[1:]) == band:
+                        band_size += int(count)
+
+        # Ties share a rank, so only strictly higher scores in the band count
+        higher_in_band = 0
+        if current_user_points < band_high:
+            for score_shard in shards:
+                count_response = leaderboards_table.query(
+                    IndexName=LEADERBOARD_SCORE_INDEX,
+                    KeyConditionExpression=(
+                        Key('score_shard').eq(score_shard)
+                        & Key('score').between(current_user_points + 1, band_high)
+                    ),
+                    Select='COUNT',
+                    Limit=LEADERBOARD_BAND_COUNT_CAP
+                )
+                higher_in_band += count_response.get('Count', 0)
+                if 'LastEvaluatedKey' in count_response:
+                    rank_is_approximate = True
+
+        if rank_is_approximate:
+            # Too many players in this band to count: assume they are spread evenly across it
+            share_above = (band_high - current_user_points) / (band_high - band_low + 1)
+            higher_in_band = max(higher_in_band, int(band_size * share_above))
+        higher += higher_in_band
+
+        current_user_rank = higher + 1
+
+    top_10 = []
+    for idx, entry in enumerate(leaders[:10]):
+        is_current_user = (entry['user_id'] == username)
+        top_10.append({
+            'rank': idx + 1,
+            'username': 'YOU' if is_current_user else generate_anonymous_name(entry['user_id']),
+            'points': int(entry.get('score', 0)),
+            'is_current_user': is_current_user
+        })
+
+    return {
+        'window': window,
+        'window_id': window_id,
+        'top_10': top_10,
+        'current_user': {
+            'rank': current_user_rank,
+            'rank_is_approximate': rank_is_approximate,
+            'points': current_user_points,
+            'total_players': total_players,
+            'show_separately': bool(current_user_rank and current_user_rank > 10)
+        }
+    }
+
 def handle_get_leaderboard(event):
     """
     Get leaderboard with top 10 users + current user's position
-    GET /leaderboard
+    GET /leaderboard                  (all-time balance)
+    GET /leaderboard?window=weekly    (points earned this day/week/season)
     """
     try:
         username, _ = get_user_info(event)
@@ -783,6 +2443,17 @@ def handle_get_leaderboard(event):
         if not username:
             return respond(401, {"message": "User not authenticated"})
         
+        query_params = event.get('queryStringParameters', {}) or {}
+        window = query_params.get('window')
+        if window:
+            if window not in LEADERBOARD_WINDOWS:
+                return respond(400, {"message": f"window must be one of: {', '.join(LEADERBOARD_WINDOWS)}"})
+            try:
+                return respond(200, get_windowed_leaderboard(username, window))
+            except BatchReadIncomplete as e:
+                print(f"⚠️ Leaderboard read throttled: {str(e)}")
+                return respond(503, {"message": "Leaderboard is busy, please try again"})
+        
         # Scan all users and get their points, sorted by total_points
         response = user_points_table.scan()
         all_users = response.get('Items', [])
@@ -841,45 +2512,63 @@ def handle_get_leaderboard(event):
         return respond(500, {"message": str(e)})
 
 
-def create_seller_challenge(event):
-    try:
-        username, groups = get_user_info(event)
-        
-        if not username:
-            return respond(401, {"message": "Could not identify user"})
-        
-        print(f"🔐 Checking seller status for user: {username}")
-        
-        if not is_seller(groups):
-            print(f"❌ Access denied for user {username}")
-            return respond(403, {"message": "Access denied. Only sellers can create challenges."})
-        
-        print(f"✅ Seller access granted for: {username}")
-        
-        body = json.loads(event.get("body", "{}"))
-        image_url = body.get("image_url")
-        centre_id = body.get("answer_hawker_centre_id")
-        challenge_id = body.get("challenge_id")
-        shop_description = body.get('shop_description', '')
+def build_challenge_item(username, data, default_id):
+    """
+    Validate one challenge payload and build its item.
+    Returns (item, None) or (None, error message).
+    """
+    if not isinstance(data, dict):
+        return None, "Challenge must be an object"
 
-        if not image_url or not centre_id:
-            return respond(400, {"message": "Missing required fields."})
+    image_url = data.get("image_url")
+    centre_id = data.get("answer_hawker_centre_id")
+    challenge_id = data.get("challenge_id") or default_id
+    shop_description = data.get('shop_description', '')
+
+    if not image_url or not centre_id:
+        return None, "Missing required fields."
 
-        if not challenge_id:
-            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            challenge_id = f"{username}-{timestamp}"
+    # Ids are issued by the upload-url endpoints; anything else could overwrite another seller's challenge
+    if not isinstance(challenge_id, str) or not challenge_id.startswith(f"{username}-"):
+        return None, "challenge_id must be one issued to you by the upload-url endpoints"
 
+    try:
         centre_id_decimal = Decimal(str(centre_id))
+    except ArithmeticError:
+        centre_id_decimal = None
+    if centre_id_decimal is None or not centre_id_decimal.is_finite():
+        return None, "answer_hawker_centre_id must be a number"
 
-        new_challenge = {
-            "id": challenge_id,
-            "answer_hawker_centre_id": centre_id_decimal,
-            'shop_description': shop_description,
-            "image_url": image_url,
-            "status": "active",
-            "created_by": username,
-        }
+    new_challenge = {
+        "id": challenge_id,
+        "answer_hawker_centre_id": centre_id_decimal,
+        'shop_description': shop_description,
+        "image_url": image_url,
+        "status": "active",
+        "created_by": username,
+    }
+
+    # Attach resized variants if the upload was processed before the challenge was created
+    image_variants = load_image_variants(challenge_id)
+    if image_variants:
+        new_challenge["image_variants"] = image_variants
+
+    return new_challenge, None
+
+def create_seller_challenge(event):
+    try:
+        username, error_response = get_seller(event, "create challenges")
+        if error_response:
+            return error_response
+
+        body = json.loads(event.get("body", "{}"))
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+
+        new_challenge, error = build_challenge_item(username, body, f"{username}-{timestamp}")
+        if error:
+            return respond(400, {"message": error})
 
+        challenge_id = new_challenge["id"]
         challenges_table.put_item(Item=new_challenge)
         print(f"✅ Challenge created by seller {username}: {challenge_id}")
         return respond(201, {"message": f"Challenge created: {challenge_id}"})
@@ -887,6 +2576,127 @@ def create_seller_challenge(event):
         print("❌ Error in create_seller_challenge:", traceback.format_exc())
         return respond(500, {"message": f"Error creating challenge: {str(e)}"})
 
+def create_seller_challenge_batch(event):
+    """
+    Create several challenges in one request
+    POST /seller/challenges/batch
+    Body: { challenges: [{ image_url, answer_hawker_centre_id, challenge_id?, shop_description? }, ...] }
+    Valid items are written through batch_writer; results are reported per item.
+    """
+    try:
+        username, error_response = get_seller(event, "create challenges")
+        if error_response:
+            return error_response
+
+        body = json.loads(event.get("body", "{}"))
+        payloads = body.get("challenges") or []
+
+        if not isinstance(payloads, list) or not payloads:
+            return respond(400, {"message": "challenges must be a non-empty list"})
+        if len(payloads) > MAX_BATCH_ITEMS:
+            return respond(400, {"message": f"At most {MAX_BATCH_ITEMS} challenges per request"})
+
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        results = []
+        items = []
+        seen_ids = set()
+        for idx, data in enumerate(payloads):
+            item, error = build_challenge_item(username, data, f"{username}-{timestamp}-{idx}")
+            if not error and item["id"] in seen_ids:
+                item, error = None, f"Duplicate challenge_id in this batch: {item['id']}"
+            if error:
+                results.append({"index": idx, "status": "error", "message": error})
+            else:
+                seen_ids.add(item["id"])
+                items.append(item)
+                results.append({"index": idx, "status": "created", "challenge_id": item["id"]})
+
+        if items:
+            with challenges_table.batch_writer(overwrite_by_pkeys=["id"]) as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+
+        print(f"✅ Batch created {len(items)}/{len(payloads)} challenges for seller {username}")
+
+        return respond(201 if items else 400, {
+            "results": results,
+            "created": len(items),
+            "failed": len(payloads) - len(items),
+        })
+    except Exception as e:
+        print("❌ Error in create_seller_challenge_batch:", traceback.format_exc())
+        return respond(500, {"message": f"Error creating challenges: {str(e)}"})
+
+def get_seller_analytics(event):
+    """
+    Get pre-aggregated challenge analytics for the authenticated seller
+    GET /seller/analytics?granularity=day&periods=30
+    Reads only the rollup buckets in range, never raw events.
+    """
+    try:
+        username, error_response = get_seller(event, "view analytics")
+        if error_response:
+            return error_response
+
+        query_params = event.get('queryStringParameters', {}) or {}
+        granularity = query_params.get('granularity', 'day')
+        if granularity not in ANALYTICS_GRANULARITIES:
+            return respond(400, {"message": f"granularity must be one of: {', '.join(ANALYTICS_GRANULARITIES)}"})
+
+        bucket_format, step, default_periods, max_periods, _ = ANALYTICS_GRANULARITIES[granularity]
+        try:
+            periods = int(query_params.get('periods', default_periods))
+        except ValueError:
+            return respond(400, {"message": "periods must be an integer"})
+        periods = max(1, min(periods, max_periods))
+
+        now = datetime.utcnow()
+        buckets = [(now - step * i).strftime(bucket_format) for i in range(periods - 1, -1, -1)]
+        items = query_seller_buckets(username, granularity, buckets[0], buckets[-1])
+
+        counters = ('views', 'guesses', 'solves')
+        series = {bucket: dict.fromkeys(counters, 0) for bucket in buckets}
+        challenges = {}
+        midpoint = buckets[len(buckets) // 2]
+
+        for item in items:
+            _, bucket, challenge_id = item['bucket'].split('#', 2)
+            stats = challenges.setdefault(challenge_id, {
+                'challenge_id': challenge_id,
+                'centre_name': item.get('centre_name', 'Unknown'),
+                **dict.fromkeys(counters, 0),
+                'earlier_guesses': 0,
+                'recent_guesses': 0,
+            })
+            for counter in counters:
+                value = int(item.get(counter, 0))
+                stats[counter] += value
+                if bucket in series:
+                    series[bucket][counter] += value
+            stats['recent_guesses' if bucket >= midpoint else 'earlier_guesses'] += int(item.get('guesses', 0))
+
+        breakdown = []
+        for stats in challenges.values():
+            earlier, recent = stats.pop('earlier_guesses'), stats.pop('recent_guesses')
+            stats['incorrect'] = stats['guesses'] - stats['solves']
+            stats['success_rate'] = round(100 * stats['solves'] / stats['guesses']) if stats['guesses'] else 0
+            stats['trend'] = 'up' if recent > earlier else 'down' if recent < earlier else 'stable'
+            breakdown.append(stats)
+        breakdown.sort(key=lambda x: x['guesses'], reverse=True)
+
+        totals = {counter: sum(b[counter] for b in breakdown) for counter in counters}
+
+        return respond(200, {
+            'granularity': granularity,
+            'periods': periods,
+            'totals': totals,
+            'series': [{'bucket': bucket, **series[bucket]} for bucket in buckets],
+            'challenges': breakdown,
+        }, event=event)
+    except Exception as e:
+        print("❌ Error in get_seller_analytics:", traceback.format_exc())
+        return respond(500, {"message": f"Error fetching analytics: {str(e)}"})
+
 def get_seller_challenges(event):
     """
     Get all challenges created by the authenticated seller
@@ -924,8 +2734,13 @@ def get_seller_challenges(event):
         return respond(200, {
             "challenges": challenges,
             "count": len(challenges)
-        })
+        }, event=event)
         
     except Exception as e:
         print("❌ Error in get_seller_challenges:", traceback.format_exc())
-        return respond(500, {"message": f"Error fetching challenges: {str(e)}"})
\ No newline at end of file
+        return respond(500, {"message": f"Error fetching challenges: {str(e)}"})
+
+
+# Provisioned concurrency runs init ahead of traffic, so pay for the catalogue loads there
+if PRELOAD_ON_INIT or os.environ.get("AWS_LAMBDA_INITIALIZATION_TYPE") == "provisioned-concurrency":
+    warm_caches()
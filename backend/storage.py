@@ -0,0 +1,74 @@
+"""
+Object storage used by the backend jobs.
+
+S3Storage talks to the assets bucket; LocalStorage mirrors the same keys under a
+directory so the jobs can be run and tested without AWS.
+"""
+import os
+
+
+class S3Storage:
+    def __init__(self, bucket, client=None):
+        if client is None:
+            import boto3
+            client = boto3.client("s3")
+        self.bucket = bucket
+        self.client = client
+
+    def get(self, key):
+        """Return the object's bytes, or None if it does not exist"""
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read()
+
+    def put(self, key, data, content_type="application/octet-stream", cache_control=None):
+        extra = {"CacheControl": cache_control} if cache_control else {}
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type, **extra)
+
+    def list_keys(self, prefix):
+        """All keys under a prefix"""
+        keys = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend(obj["Key"] for obj in page.get("Contents", []))
+        return keys
+
+    def url(self, key):
+        return f"https://{self.bucket}.s3.amazonaws.com/{key}"
+
+
+class LocalStorage:
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def get(self, key):
+        """Return the file's bytes, or None if it does not exist"""
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data, content_type="application/octet-stream", cache_control=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def list_keys(self, prefix):
+        """All keys under a prefix"""
+        keys = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                key = os.path.relpath(os.path.join(dirpath, filename), self.root).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+    def url(self, key):
+        return f"file://{self._path(key)}"
@@ -4,6 +4,7 @@ import { MapContainer, TileLayer, CircleMarker, Popup } from "react-leaflet";
 import "leaflet/dist/leaflet.css";
 import api from "../api";
 import Leaderboard from "./Leaderboard";
+import ChallengeImage from "./ChallengeImage";
 
 export default function Challenge() {
   const navigate = useNavigate();
@@ -83,8 +84,9 @@ export default function Challenge() {
       <h2 style={styles.title}>🧭 Guess the Hawker Centre!</h2>
       
       <div style={styles.imageContainer}>
-        <img
-          src={challenge.image_url}
+        <ChallengeImage
+          challenge={challenge}
+          sizes="(max-width: 555px) 90vw, 500px"
           alt="Challenge"
           style={styles.image}
         />
@@ -0,0 +1,59 @@
+import React from "react";
+
+// Variant sizes written by backend/image_processor.py, smallest first
+const VARIANT_SIZES = ["thumb", "medium"];
+
+function buildSrcSet(variants, format) {
+  return VARIANT_SIZES.filter((size) => variants[size]?.[format])
+    .map((size) => `${variants[size][format]} ${variants[size].width}w`)
+    .join(", ");
+}
+
+/**
+ * Pick the smallest variant covering a rendered width (in CSS pixels).
+ * Falls back to the original upload for challenges without variants.
+ * @param {Object} challenge - Challenge with image_url and optional image_variants
+ * @param {number} cssWidth - Width the image is displayed at
+ * @returns {string} Image URL
+ */
+export const pickImageUrl = (challenge, cssWidth) => {
+  const variants = challenge?.image_variants;
+  if (!variants) return challenge?.image_url;
+
+  const needed = cssWidth * (window.devicePixelRatio || 1);
+  const available = VARIANT_SIZES.filter((size) => variants[size]);
+  const size = available.find((s) => variants[s].width >= needed) || available[available.length - 1];
+  if (!size) return challenge.image_url;
+
+  return variants[size].webp || variants[size].jpeg || challenge.image_url;
+};
+
+/**
+ * Challenge photo that lets the browser choose a size and format (AVIF/WebP/JPEG).
+ */
+export default function ChallengeImage({ challenge, sizes, alt, style, onError }) {
+  const variants = challenge.image_variants;
+
+  if (!variants) {
+    return <img src={challenge.image_url} alt={alt} style={style} onError={onError} />;
+  }
+
+  return (
+    <picture>
+      {["avif", "webp"].map((format) => {
+        const srcSet = buildSrcSet(variants, format);
+        return srcSet ? (
+          <source key={format} type={`image/${format}`} srcSet={srcSet} sizes={sizes} />
+        ) : null;
+      })}
+      <img
+        src={variants.medium?.jpeg || challenge.image_url}
+        srcSet={buildSrcSet(variants, "jpeg") || undefined}
+        sizes={sizes}
+        alt={alt}
+        style={style}
+        onError={onError}
+      />
+    </picture>
+  );
+}
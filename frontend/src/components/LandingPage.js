@@ -2,6 +2,7 @@ import React, { useEffect, useState } from "react";
 import { useNavigate, useSearchParams } from "react-router-dom";
 import api from "../api";
 import Leaderboard from "./Leaderboard";
+import ChallengeImage from "./ChallengeImage";
 
 // Fun facts data
 const HAWKER_FACTS = [
@@ -147,8 +148,9 @@ export default function LandingPage() {
             {featuredChallenges.map((challenge, index) => (
               <div key={challenge.id || index} style={styles.challengeCard}>
                 <div style={styles.challengeImageContainer}>
-                  <img 
-                    src={challenge.image_url} 
+                  <ChallengeImage
+                    challenge={challenge}
+                    sizes="(max-width: 600px) 100vw, 320px"
                     alt="Hawker stall" 
                     style={styles.challengeImage}
                     onError={(e) => {
@@ -64,6 +64,7 @@ export default function Seller() {
       const res = await api.post("/points/spend", {
         amount: 1000,
         source: "challenge_boost",
+        challenge_id: challengeId,
         description: `Boosted challenge ${challengeId}`
       });
 
@@ -1,54 +1,37 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
+import api from '../api';
 
 const SellerAnalytics = () => {
-  // Static analytics data for POC
-  const challengeStats = [
-    {
-      id: 1,
-      storeName: "Old Airport Road Food Centre",
-      totalAttempts: 456,
-      correctGuesses: 342,
-      incorrectGuesses: 114,
-      successRate: 75,
-      trending: 'up',
-    },
-    {
-      id: 2,
-      storeName: "Maxwell Food Centre",
-      totalAttempts: 389,
-      correctGuesses: 267,
-      incorrectGuesses: 122,
-      successRate: 69,
-      trending: 'up',
-    },
-    {
-      id: 3,
-      storeName: "Tekka Centre",
-      totalAttempts: 312,
-      correctGuesses: 156,
-      incorrectGuesses: 156,
-      successRate: 50,
-      trending: 'down',
-    },
-    {
-      id: 4,
-      storeName: "Tiong Bahru Market",
-      totalAttempts: 278,
-      correctGuesses: 223,
-      incorrectGuesses: 55,
-      successRate: 80,
-      trending: 'up',
-    },
-    {
-      id: 5,
-      storeName: "Golden Mile Food Centre",
-      totalAttempts: 201,
-      correctGuesses: 141,
-      incorrectGuesses: 60,
-      successRate: 70,
-      trending: 'stable',
-    },
-  ];
+  const [challengeStats, setChallengeStats] = useState([]);
+  const [loading, setLoading] = useState(true);
+
+  // Pre-aggregated daily rollups for the last 30 days
+  useEffect(() => {
+    async function fetchAnalytics() {
+      try {
+        const res = await api.get("/seller/analytics", {
+          params: { granularity: "day", periods: 30 },
+        });
+        setChallengeStats(
+          (res.data.challenges || []).map((stat) => ({
+            id: stat.challenge_id,
+            storeName: stat.centre_name,
+            totalAttempts: stat.guesses,
+            correctGuesses: stat.solves,
+            incorrectGuesses: stat.incorrect,
+            successRate: stat.success_rate,
+            trending: stat.trend,
+          }))
+        );
+      } catch (err) {
+        console.error("❌ Failed to load analytics:", err);
+        setChallengeStats([]);
+      } finally {
+        setLoading(false);
+      }
+    }
+    fetchAnalytics();
+  }, []);
 
   const getTrendIcon = (trend) => {
     switch(trend) {
@@ -76,6 +59,14 @@ const SellerAnalytics = () => {
     ? Math.round((totals.correctGuesses / totals.totalAttempts) * 100) 
     : 0;
 
+  // Insights need at least one attempted challenge
+  const attempted = challengeStats.filter((stat) => stat.totalAttempts > 0);
+  const topPerformer = attempted.reduce((best, stat) => (!best || stat.successRate > best.successRate ? stat : best), null);
+  const needsAttention = attempted.reduce((worst, stat) => (!worst || stat.successRate < worst.successRate ? stat : worst), null);
+  const mostPopular = attempted.reduce((top, stat) => (!top || stat.totalAttempts > top.totalAttempts ? stat : top), null);
+
+  if (loading) return <p style={styles.subtitle}>Loading analytics...</p>;
+
   return (
     <div style={styles.container}>
       {/* Header */}
@@ -136,6 +127,11 @@ const SellerAnalytics = () => {
               </tr>
             </thead>
             <tbody>
+              {challengeStats.length === 0 && (
+                <tr style={styles.row}>
+                  <td style={styles.td} colSpan={6}>No player activity on your challenges yet</td>
+                </tr>
+              )}
               {challengeStats.map((stat) => (
                 <tr key={stat.id} style={styles.row}>
                   <td style={{...styles.td, ...styles.storeNameCell}}>
@@ -185,40 +181,42 @@ const SellerAnalytics = () => {
       </div>
 
       {/* Insights Section */}
-      <div style={styles.insightsContainer}>
-        <h3 style={styles.insightsTitle}>💡 Insights & Recommendations</h3>
-        <div style={styles.insightsGrid}>
-          <div style={styles.insightCard}>
-            <div style={styles.insightIcon}>🏆</div>
-            <div style={styles.insightContent}>
-              <h4 style={styles.insightHeading}>Top Performer</h4>
-              <p style={styles.insightText}>
-                <strong>Tiong Bahru Market</strong> has the highest success rate at 80%!
-              </p>
+      {attempted.length > 0 && (
+        <div style={styles.insightsContainer}>
+          <h3 style={styles.insightsTitle}>💡 Insights & Recommendations</h3>
+          <div style={styles.insightsGrid}>
+            <div style={styles.insightCard}>
+              <div style={styles.insightIcon}>🏆</div>
+              <div style={styles.insightContent}>
+                <h4 style={styles.insightHeading}>Top Performer</h4>
+                <p style={styles.insightText}>
+                  <strong>{topPerformer.storeName}</strong> has the highest success rate at {topPerformer.successRate}%!
+                </p>
+              </div>
             </div>
-          </div>
 
-          <div style={styles.insightCard}>
-            <div style={styles.insightIcon}>⚠️</div>
-            <div style={styles.insightContent}>
-              <h4 style={styles.insightHeading}>Needs Attention</h4>
-              <p style={styles.insightText}>
-                <strong>Tekka Centre</strong> has a 50% success rate. Consider improving image quality.
-              </p>
+            <div style={styles.insightCard}>
+              <div style={styles.insightIcon}>⚠️</div>
+              <div style={styles.insightContent}>
+                <h4 style={styles.insightHeading}>Needs Attention</h4>
+                <p style={styles.insightText}>
+                  <strong>{needsAttention.storeName}</strong> has a {needsAttention.successRate}% success rate. Consider improving image quality.
+                </p>
+              </div>
             </div>
-          </div>
 
-          <div style={styles.insightCard}>
-            <div style={styles.insightIcon}>🔥</div>
-            <div style={styles.insightContent}>
-              <h4 style={styles.insightHeading}>Most Popular</h4>
-              <p style={styles.insightText}>
-                <strong>Old Airport Road</strong> has the most attempts (456). Keep it up!
-              </p>
+            <div style={styles.insightCard}>
+              <div style={styles.insightIcon}>🔥</div>
+              <div style={styles.insightContent}>
+                <h4 style={styles.insightHeading}>Most Popular</h4>
+                <p style={styles.insightText}>
+                  <strong>{mostPopular.storeName}</strong> has the most attempts ({mostPopular.totalAttempts}). Keep it up!
+                </p>
+              </div>
             </div>
           </div>
         </div>
-      </div>
+      )}
     </div>
   );
 };
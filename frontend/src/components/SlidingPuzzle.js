@@ -2,6 +2,10 @@ import React, { useState, useEffect, useCallback } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../api";
 import { awardPoints } from "../services/pointsService";
+import { pickImageUrl } from "./ChallengeImage";
+
+// Rendered puzzle width in CSS pixels (see styles.puzzleGrid)
+const PUZZLE_WIDTH = 400;
 
 export default function SlidingPuzzle() {
   const navigate = useNavigate();
@@ -122,6 +126,8 @@ export default function SlidingPuzzle() {
   if (loading) return <p style={styles.loading}>Loading puzzle...</p>;
   if (!challenge) return <p style={styles.loading}>No challenge found.</p>;
 
+  const puzzleImageUrl = pickImageUrl(challenge, PUZZLE_WIDTH);
+
   return (
     <div style={styles.container}>
       <div style={styles.header}>
@@ -152,7 +158,7 @@ export default function SlidingPuzzle() {
                 ...styles.tile,
                 ...(index === emptyIndex ? styles.emptyTile : {}),
                 backgroundImage:
-                  index === emptyIndex ? "none" : `url(${challenge.image_url})`,
+                  index === emptyIndex ? "none" : `url(${puzzleImageUrl})`,
                 backgroundPosition: getTilePosition(tileValue),
                 backgroundSize: "300%",
                 cursor:
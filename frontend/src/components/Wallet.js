@@ -1,11 +1,11 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { 
-  getBalance, 
-  getTransactions, 
+  getWalletSummary, 
   getRewards, 
   claimReward, 
-  getMyRewards 
+  getMyRewards,
+  getTransactions
 } from '../services/pointsService';
 import './Wallet.css';
 
@@ -13,29 +13,50 @@ const Wallet = () => {
   const navigate = useNavigate();
   const [activeTab, setActiveTab] = useState('balance'); // 'balance', 'rewards', 'myRewards'
   const [balance, setBalance] = useState(0);
+  const [earnedThisWeek, setEarnedThisWeek] = useState(0);
   const [transactions, setTransactions] = useState([]);
   const [availableRewards, setAvailableRewards] = useState([]);
-  const [myRewards, setMyRewards] = useState([]);
+  const [activeRewardCount, setActiveRewardCount] = useState(0);
+  const [myRewards, setMyRewards] = useState(null); // fetched when the My Rewards tab opens
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     loadWalletData();
   }, []);
 
+  useEffect(() => {
+    if (activeTab === 'myRewards' && myRewards === null) {
+      getMyRewards().then(setMyRewards);
+    }
+  }, [activeTab, myRewards]);
+
   const loadWalletData = async () => {
     setLoading(true);
     try {
-      const [balanceData, transactionsData, rewardsData, myRewardsData] = await Promise.all([
-        getBalance(),
-        getTransactions(20),
+      // The summary carries the balance, recent activity and reward count in one read
+      const [summary, rewardsData] = await Promise.all([
+        getWalletSummary(),
         getRewards(),
-        getMyRewards(),
       ]);
 
-      setBalance(balanceData);
-      setTransactions(transactionsData);
+      setBalance(summary?.total_points || 0);
+      setEarnedThisWeek(summary?.earned_this_week || 0);
       setAvailableRewards(rewardsData);
-      setMyRewards(myRewardsData);
+
+      if (summary?.has_summary) {
+        setTransactions(summary.recent_activity || []);
+        setActiveRewardCount(summary.active_rewards || 0);
+        setMyRewards(null);
+      } else {
+        // No summary item yet (not backfilled, or the read failed): use the history endpoints
+        const [history, claimed] = await Promise.all([
+          getTransactions(20),
+          getMyRewards(),
+        ]);
+        setTransactions(history);
+        setActiveRewardCount(claimed.length);
+        setMyRewards(claimed);
+      }
     } catch (error) {
       console.error('Error loading wallet data:', error);
     } finally {
@@ -120,6 +141,7 @@ const Wallet = () => {
         <div className="balance-info">
           <p className="balance-label">Total Points</p>
           <h2 className="balance-amount">{balance.toLocaleString()}</h2>
+          <p className="balance-label">+{earnedThisWeek.toLocaleString()} earned this week</p>
         </div>
       </div>
 
@@ -141,7 +163,7 @@ const Wallet = () => {
           className={`tab ${activeTab === 'myRewards' ? 'active' : ''}`}
           onClick={() => setActiveTab('myRewards')}
         >
-          🏆 My Rewards ({myRewards.length})
+          🏆 My Rewards ({myRewards ? myRewards.length : activeRewardCount})
         </button>
       </div>
 
@@ -232,7 +254,12 @@ const Wallet = () => {
         {activeTab === 'myRewards' && (
           <div className="my-rewards-section">
             <h3 className="section-title">Your Claimed Rewards</h3>
-            {myRewards.length === 0 ? (
+            {myRewards === null ? (
+              <div className="empty-state">
+                <p className="empty-icon">🏆</p>
+                <p className="empty-text">Loading your rewards...</p>
+              </div>
+            ) : myRewards.length === 0 ? (
               <div className="empty-state">
                 <p className="empty-icon">🏆</p>
                 <p className="empty-text">No rewards claimed yet</p>
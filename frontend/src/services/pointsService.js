@@ -80,6 +80,35 @@ export const getBalance = async () => {
   }
 };
 
+/**
+ * Get everything the wallet screen shows in one request
+ * @returns {Promise<Object|null>} Balance, totals, earn tallies, recent activity and active reward count
+ */
+export const getWalletSummary = async () => {
+  try {
+    const token = localStorage.getItem('access_token');
+    
+    if (!token) {
+      return null;
+    }
+
+    const response = await fetch(`${API_BASE_URL}/wallet/summary`, {
+      headers: {
+        'Authorization': `Bearer ${token}`,
+      },
+    });
+
+    if (response.ok) {
+      return await response.json();
+    }
+    
+    return null;
+  } catch (error) {
+    console.error('Error fetching wallet summary:', error);
+    return null;
+  }
+};
+
 /**
  * Get user's transaction history
  * @param {number} limit - Number of transactions to fetch
@@ -286,6 +315,7 @@ export const getMyRewards = async () => {
 export default {
   awardPoints,
   getBalance,
+  getWalletSummary,
   getTransactions,
   getRewards,
   claimReward,